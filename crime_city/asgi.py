@@ -10,6 +10,10 @@ django_asgi_app = get_asgi_application()
 
 # Import after setting DJANGO_SETTINGS_MODULE
 import game.routing
+from game.services import reference_data_service
+
+# Load static game data before the first request
+reference_data_service.preload()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
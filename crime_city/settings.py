@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'game.middleware.ViewMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -121,6 +124,15 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache shared by all web, Celery and scheduler processes; version keys
+# in it tell every process when its in-memory game data is stale
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
 # Celery settings
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -128,6 +140,17 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Backstop for releases when manage.py run_release_scheduler is not running
+    'release-due-players': {
+        'task': 'game.tasks.release_due_players',
+        'schedule': 30.0,
+    },
+    'report-property-economy': {
+        'task': 'game.tasks.report_property_economy',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
 
 # Authentication settings
 LOGIN_URL = '/login/'
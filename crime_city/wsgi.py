@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crime_city.settings')
 
 application = get_wsgi_application()
+
+# Load static game data before the first request
+from game.services import reference_data_service
+reference_data_service.preload()
@@ -17,7 +17,7 @@ from game.models import (
 # Player admin
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
-    list_display = ('nickname', 'level', 'cash', 'energy', 'health')
+    list_display = ('nickname', 'level', 'cash', 'current_energy', 'current_health')
     search_fields = ('nickname', 'user__username')
     list_filter = ('level', 'is_in_hospital', 'is_in_jail')
 
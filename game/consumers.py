@@ -2,11 +2,13 @@
 WebSocket consumers for real-time functionality.
 This is a placeholder file for now.
 """
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from .models.player import Player
+from .services import notification_service, release_service, status_service
 
 class GameConsumer(AsyncWebsocketConsumer):
     """
@@ -15,6 +17,7 @@ class GameConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
         self.player = None
+        self.status = None
         
         # Only authenticated users can connect
         if self.user and not isinstance(self.user, AnonymousUser):
@@ -33,11 +36,14 @@ class GameConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             
+            # Queued notifications are delivered on this event loop
+            notification_service.bind_event_loop(asyncio.get_running_loop())
+            
             # Accept the connection
             await self.accept()
             
-            # Send initial status update
-            await self.send_player_status()
+            # Send the initial snapshot; deltas keep it current afterwards
+            await self.send_player_status(resync=True)
         else:
             # Reject the connection if not authenticated
             await self.close()
@@ -66,6 +72,8 @@ class GameConsumer(AsyncWebsocketConsumer):
             
             if action == 'get_status':
                 await self.send_player_status()
+            elif action == 'resync':
+                await self.send_player_status(resync=True)
             elif action == 'refresh_combat':
                 await self.send_combat_status(data.get('combat_id'))
         except Exception as e:
@@ -73,8 +81,11 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def player_update(self, event):
         """
-        Handler for player update events.
+        Handler for player update events (changed status fields only).
         """
+        if self.status is not None:
+            self.status.update(event['data'])
+        
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'type': 'player_update',
@@ -109,36 +120,27 @@ class GameConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def get_player_data(self):
         """
-        Get serialized player data.
+        Get the serialized stored status of the player.
         """
-        player = Player.objects.get(user=self.user)
-        player.check_status()  # Update player status
-        player.regenerate_energy()  # Update energy
-        player.regenerate_health()  # Update health
-        
-        return {
-            'id': player.id,
-            'nickname': player.nickname,
-            'level': player.level,
-            'experience': player.experience,
-            'cash': player.cash,
-            'energy': player.energy,
-            'max_energy': player.max_energy,
-            'health': player.health,
-            'max_health': player.max_health,
-            'location': player.current_location.name if player.current_location else None,
-            'is_in_hospital': player.is_in_hospital,
-            'is_in_jail': player.is_in_jail,
-        }
+        player = Player.objects.select_related('current_location').get(user=self.user)
+        release_service.release_if_due(player)
+        return status_service.serialize_status(player)
     
-    async def send_player_status(self):
+    async def send_player_status(self, resync=False):
         """
         Send current player status.
+        
+        The status is loaded from the database on connect and resync only;
+        otherwise it is derived from the last snapshot and the deltas since.
         """
-        player_data = await self.get_player_data()
+        if resync or self.status is None:
+            self.status = await self.get_player_data()
+        
         await self.send(text_data=json.dumps({
             'type': 'player_status',
-            'data': player_data
+            'data': status_service.current_status(self.status),
+            'energy_regen_interval': Player.ENERGY_REGEN_INTERVAL,
+            'health_regen_interval': Player.HEALTH_REGEN_INTERVAL,
         }))
     
     async def send_error(self, message):
@@ -180,7 +182,7 @@ class GameConsumer(AsyncWebsocketConsumer):
         if not combat_id:
             await self.send_error("Combat ID is required")
             return
-            
+        
         try:
             combat_data = await self.get_combat_data(combat_id)
             await self.send(text_data=json.dumps({
@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from game.metrics import percentile
+from game.models import Combat, CombatLog, Location, Player
+from game.services import combat_service
+
+DAMAGE_MESSAGE = re.compile(r' hits for (\d+) damage!$')
+
+class Command(BaseCommand):
+    help = "Benchmark many players attacking one defender at the same time"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--attackers', type=int, default=100,
+            help="Number of concurrent attackers"
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=1,
+            help="Attacks per attacker (each costs 5 energy)"
+        )
+        parser.add_argument(
+            '--prefix', default='bench_',
+            help="Username prefix of the benchmark players"
+        )
+    
+    def handle(self, *args, **options):
+        if options['attackers'] < 1 or options['rounds'] < 1:
+            raise CommandError("--attackers and --rounds must be at least 1")
+        if options['rounds'] * 5 > 100:
+            raise CommandError("Attackers only have energy for 20 rounds")
+        
+        location = Location.objects.filter(is_safe_zone=False).order_by('id').first()
+        if location is None:
+            raise CommandError("No location where players can fight; load the game fixtures first")
+        
+        defender, attackers = self.setup_players(options['prefix'], options['attackers'], location)
+        started_at = timezone.now()
+        total_cash = Player.objects.filter(id__in=[defender.id] + attackers).aggregate(total=Sum('cash'))['total']
+        
+        # Release the main thread's connection before the attackers open theirs
+        connection.close()
+        
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(attackers))
+        
+        def attack(attacker_id):
+            try:
+                attacker = Player.objects.get(id=attacker_id)
+                target = Player.objects.get(id=defender.id)
+                barrier.wait()
+                
+                for _ in range(options['rounds']):
+                    start = time.perf_counter()
+                    try:
+                        combat, _, message = combat_service.initiate_combat(attacker, target, location)
+                    except Exception as e:
+                        combat, message = None, f"{type(e).__name__}: {e}"
+                    elapsed = time.perf_counter() - start
+                    
+                    with lock:
+                        latencies.append(elapsed * 1000)
+                        if combat is None:
+                            failures.append(message)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=attack, args=(attacker_id,)) for attacker_id in attackers]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        self.report(
+            defender, attackers, started_at, total_cash,
+            latencies, failures, elapsed
+        )
+    
+    def setup_players(self, prefix, count, location):
+        """
+        Create (or reset) one defender and `count` attackers at `location`
+        Returns: (defender, list of attacker IDs)
+        """
+        usernames = [f"{prefix}defender"] + [f"{prefix}attacker_{i}" for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        for username in usernames:
+            if username not in existing:
+                # The post_save signal creates the player
+                User.objects.create(username=username)
+        
+        now = timezone.now()
+        players = Player.objects.filter(user__username__in=usernames)
+        players.update(
+            current_location=location,
+            level=1,
+            experience=0,
+            cash=1000,
+            energy=100,
+            max_energy=100,
+            health=100,
+            max_health=100,
+            last_energy_refill=now,
+            last_health_refill=now,
+            is_in_hospital=False,
+            hospital_release_time=None,
+            is_in_jail=False,
+            jail_release_time=None,
+        )
+        
+        # A defender that can neither be hospitalized nor level up (which
+        # would refill health) keeps every hit visible in its health
+        defender = Player.objects.get(user__username=usernames[0])
+        defender.level = 10000
+        defender.health = defender.max_health = 10 ** 9
+        defender.save(update_fields=['level', 'health', 'max_health'])
+        
+        Combat.objects.filter(defender=defender).delete()
+        
+        attackers = list(players.exclude(id=defender.id).values_list('id', flat=True))
+        return defender, attackers
+    
+    def report(self, defender, attackers, started_at, total_cash, latencies, failures, elapsed):
+        latencies.sort()
+        succeeded = len(latencies) - len(failures)
+        
+        self.stdout.write(f"Attacks:        {len(latencies)} by {len(attackers)} attackers")
+        self.stdout.write(f"Succeeded:      {succeeded}")
+        self.stdout.write(f"Failed:         {len(failures)}")
+        self.stdout.write(f"Elapsed:        {elapsed:.2f}s")
+        self.stdout.write(f"Throughput:     {succeeded / elapsed:.1f} fights/s")
+        self.stdout.write(
+            f"Latency (ms):   p50 {percentile(latencies, 50):.1f}  "
+            f"p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}"
+        )
+        
+        for message in sorted(set(failures))[:5]:
+            self.stdout.write(f"  failure: {message} (x{failures.count(message)})")
+        
+        # Every hit recorded in a combat log must show up in the defender's health
+        defender.refresh_from_db()
+        logs = CombatLog.objects.filter(
+            combat__defender=defender,
+            combat__started_at__gte=started_at,
+            combat__winner_id__in=attackers
+        ).values_list('message', flat=True)
+        damage = sum(int(match.group(1)) for match in map(DAMAGE_MESSAGE.search, logs) if match)
+        lost_damage = defender.health - (defender.max_health - damage)
+        
+        combats = Combat.objects.filter(defender=defender, started_at__gte=started_at).count()
+        cash = Player.objects.filter(id__in=[defender.id] + attackers).aggregate(total=Sum('cash'))['total']
+        
+        self.stdout.write(f"Combats saved:  {combats}")
+        self.stdout.write(f"Lost damage:    {lost_damage}")
+        self.stdout.write(f"Cash drift:     {cash - total_cash}")
+        
+        if combats != succeeded or lost_damage or cash != total_cash:
+            self.stdout.write(self.style.ERROR("Lost updates detected"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No lost updates"))
@@ -0,0 +1,97 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.metrics import percentile
+from game.services.routing_service import RouteGraph
+
+class Command(BaseCommand):
+    help = "Benchmark route planning on a generated map (the database is not used)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--locations', type=int, default=5000,
+            help="Number of locations"
+        )
+        parser.add_argument(
+            '--degree', type=int, default=4,
+            help="Average connections per location"
+        )
+        parser.add_argument(
+            '--queries', type=int, default=10000,
+            help="Number of routes to plan"
+        )
+        parser.add_argument(
+            '--origins', type=int, default=100,
+            help="Number of distinct origins the routes start from"
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Random seed for a reproducible map"
+        )
+    
+    def handle(self, *args, **options):
+        if options['locations'] < 2 or options['degree'] < 1 or options['origins'] < 1:
+            raise CommandError("Need at least 2 locations, degree 1 and 1 origin")
+        
+        rng = random.Random(options['seed'])
+        graph = self.generate_graph(rng, options['locations'], options['degree'])
+        location_ids = list(graph.min_levels)
+        origins = rng.sample(location_ids, min(options['origins'], len(location_ids)))
+        
+        # Cold: one shortest-path tree per origin and metric
+        cold = []
+        for by in ('time', 'cost'):
+            for origin_id in origins:
+                started = time.perf_counter()
+                graph.shortest_paths(origin_id, by)
+                cold.append((time.perf_counter() - started) * 1000)
+        
+        # Warm: routes from the cached trees
+        warm = []
+        unreachable = 0
+        for _ in range(options['queries']):
+            origin_id = rng.choice(origins)
+            destination_id = rng.choice(location_ids)
+            by = rng.choice(('time', 'cost'))
+            
+            started = time.perf_counter()
+            route = graph.route(origin_id, destination_id, by)
+            warm.append((time.perf_counter() - started) * 1000)
+            if route is None:
+                unreachable += 1
+        
+        cold.sort()
+        warm.sort()
+        self.stdout.write(f"Map:            {options['locations']} locations, {sum(len(e) for e in graph.edges.values())} connections")
+        self.stdout.write(
+            f"Tree (ms):      p50 {percentile(cold, 50):.2f}  p95 {percentile(cold, 95):.2f}  "
+            f"max {cold[-1]:.2f}  ({len(cold)} trees)"
+        )
+        self.stdout.write(
+            f"Route (ms):     p50 {percentile(warm, 50):.4f}  p95 {percentile(warm, 95):.4f}  "
+            f"p99 {percentile(warm, 99):.4f}  ({len(warm)} routes, {unreachable} unreachable)"
+        )
+        self.stdout.write(f"Routes/s:       {len(warm) / (sum(warm) / 1000):.0f}")
+    
+    def generate_graph(self, rng, count, degree):
+        """
+        Generate a connected map: a ring of two-way roads plus random shortcuts
+        Returns: RouteGraph
+        """
+        connections = []
+        for location_id in range(1, count + 1):
+            neighbour = location_id % count + 1
+            travel_time, travel_cost = rng.randint(10, 300), rng.randint(0, 100)
+            connections.append((location_id, neighbour, travel_time, travel_cost))
+            connections.append((neighbour, location_id, travel_time, travel_cost))
+            
+            for _ in range(max(0, degree - 2)):
+                connections.append((
+                    location_id, rng.randint(1, count),
+                    rng.randint(10, 600), rng.randint(0, 200)
+                ))
+        
+        min_levels = {location_id: rng.choice((1, 1, 1, 5, 10)) for location_id in range(1, count + 1)}
+        return RouteGraph(connections, min_levels)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from game.models import CrimeType, Item, ItemType, Location, LocationConnection, Player, PropertyType
+from game.services import combat_service, crime_service, market_service, property_service, release_service
+from game.services.opponent_index_service import verified_opponents
+from game.services.order_book_service import get_order_book
+from game.testing import assert_no_sequential_scans
+
+# Small, rarely changing tables that may be read in full
+REFERENCE_TABLES = tuple(
+    model._meta.db_table
+    for model in (CrimeType, Item, ItemType, Location, LocationConnection, PropertyType)
+)
+
+def service_queries():
+    """
+    Hot service queries to check
+    Returns: list of (name, function, args)
+    """
+    # Unsaved objects are enough to build the queries
+    player = Player(id=0, level=1)
+    
+    return [
+        # Opponents are sampled in memory; only the check of the sampled
+        # IDs against the database runs SQL, so EXPLAIN that directly
+        ('get_available_opponents', verified_opponents, ([player.id], 0, player.level)),
+        ('get_recent_combat_logs', combat_service.get_recent_combat_logs, (player,)),
+        ('get_recent_crimes', crime_service.get_recent_crimes, (player,)),
+        ('get_crime_stats', crime_service.get_crime_stats, (player,)),
+        ('get_active_listings', market_service.get_active_listings, (player,)),
+        ('order book load', get_order_book().load, ()),
+        ('get_player_listings', market_service.get_player_listings, (player,)),
+        ('get_expired_listings', market_service.get_expired_listings, ()),
+        ('get_player_properties', property_service.get_player_properties, (player,)),
+        ('get_pending_releases', release_service.get_pending_releases, (timezone.now(),)),
+    ]
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot service queries and fail if any of them scans a table sequentially"
+    
+    def handle(self, *args, **options):
+        failures = []
+        
+        for name, func, func_args in service_queries():
+            try:
+                checked = assert_no_sequential_scans(func, *func_args, ignore_tables=REFERENCE_TABLES)
+                if not checked:
+                    raise AssertionError(f"{name} ran no SELECT, so nothing was checked")
+            except AssertionError as e:
+                failures.append(str(e))
+                self.stdout.write(self.style.ERROR(f"FAIL {name}"))
+            else:
+                self.stdout.write(f"ok   {name} ({checked} queries)")
+        
+        if failures:
+            raise CommandError('\n\n'.join(failures))
@@ -0,0 +1,395 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import Resolver404, resolve
+
+from game.metrics import percentile
+from game.models import Item, Location, Player, PlayerInventory
+
+DEFAULT_MIX = 'train=3,crime=4,attack=2,market_list=1,market_buy=1'
+
+CRIME_LINK = re.compile(r'/crimes/commit/(\d+)/')
+ATTACK_LINK = re.compile(r'/combat/attack/(\d+)/')
+BUY_LINK = re.compile(r'/market/buy/(\d+)/')
+
+ACTIONS = ('train', 'crime', 'attack', 'market_list', 'market_buy')
+
+TRAINABLE_STATS = ['strength', 'defense', 'speed', 'dexterity', 'intelligence']
+
+class LoadStats:
+    """
+    Latencies and errors per endpoint, shared by all simulated players
+    """
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+    
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds * 1000)
+            if not ok:
+                self.errors[endpoint] += 1
+    
+    def rows(self, elapsed):
+        """
+        Summarise the run per endpoint
+        Returns: list of dicts sorted by endpoint
+        """
+        rows = []
+        with self._lock:
+            for endpoint in sorted(self.latencies):
+                latencies = sorted(self.latencies[endpoint])
+                errors = self.errors[endpoint]
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': len(latencies),
+                    'errors': errors,
+                    'error_rate': errors / len(latencies) * 100,
+                    'throughput': len(latencies) / elapsed,
+                    'p50': percentile(latencies, 50),
+                    'p95': percentile(latencies, 95),
+                    'p99': percentile(latencies, 99),
+                })
+        return rows
+
+class _NoRedirect(HTTPRedirectHandler):
+    # Redirects are the normal response to game actions; time the action only
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class HttpSession:
+    """
+    Browser-like session (cookies and CSRF token) against a running server
+    """
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect())
+    
+    def _csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+    
+    def request(self, method, path, data=None):
+        """
+        Send a request
+        Returns: (status code, response body)
+        """
+        url = self.base_url + path
+        body = None
+        headers = {}
+        
+        if method == 'POST':
+            body = urlencode(data or {}).encode()
+            headers = {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': self._csrf_token(),
+                'Referer': url,
+            }
+        
+        try:
+            with self.opener.open(Request(url, data=body, headers=headers, method=method), timeout=30) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+    
+    def close(self):
+        pass
+
+class ClientSession:
+    """
+    Session running requests in this process through the Django test client
+    """
+    def __init__(self):
+        self.client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+    
+    def request(self, method, path, data=None):
+        """
+        Send a request
+        Returns: (status code, response body)
+        """
+        if method == 'POST':
+            response = self.client.post(path, data or {})
+        else:
+            response = self.client.get(path)
+        return response.status_code, response.content.decode('utf-8', 'replace')
+    
+    def close(self):
+        # Each player thread has its own database connection
+        connection.close()
+
+class SimulatedPlayer:
+    """
+    One player logging in and then picking actions from the mix until the
+    deadline, pausing for a random think time between actions
+    """
+    def __init__(self, session, username, password, stats, mix, think_time, rng):
+        self.session = session
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.actions, self.weights = zip(*mix.items())
+        self.think_time = think_time
+        self.rng = rng
+    
+    def request(self, method, path, data=None):
+        try:
+            endpoint = resolve(path).url_name
+        except Resolver404:
+            endpoint = path
+        
+        started = time.perf_counter()
+        try:
+            status, body = self.session.request(method, path, data)
+        except (URLError, OSError):
+            status, body = None, ''
+        
+        self.stats.record(f"{method} {endpoint}", time.perf_counter() - started, status is not None and status < 400)
+        return status, body
+    
+    def run(self, deadline):
+        try:
+            self.request('GET', '/login/')
+            status, _ = self.request('POST', '/login/', {
+                'username': self.username,
+                'password': self.password,
+            })
+            if status != 302:
+                return
+            
+            while time.monotonic() < deadline:
+                action = self.rng.choices(self.actions, weights=self.weights)[0]
+                getattr(self, action)()
+                time.sleep(self.rng.uniform(*self.think_time))
+        finally:
+            self.session.close()
+    
+    def _pick(self, pattern, body):
+        ids = pattern.findall(body)
+        return self.rng.choice(ids) if ids else None
+    
+    def train(self):
+        self.request('POST', '/train/', {'stat': self.rng.choice(TRAINABLE_STATS)})
+    
+    def crime(self):
+        _, body = self.request('GET', '/crimes/')
+        crime_type_id = self._pick(CRIME_LINK, body)
+        if crime_type_id:
+            self.request('POST', f'/crimes/commit/{crime_type_id}/')
+    
+    def attack(self):
+        _, body = self.request('GET', '/combat/')
+        player_id = self._pick(ATTACK_LINK, body)
+        if player_id:
+            self.request('GET', f'/combat/attack/{player_id}/')
+    
+    def market_list(self):
+        status, body = self.request('GET', '/market/api/inventory-items/')
+        if status != 200:
+            return
+        items = json.loads(body)['items']
+        if items:
+            item = self.rng.choice(items)
+            self.request('POST', '/market/create/', {
+                'item_id': item['id'],
+                'quantity': 1,
+                'price': max(1, int(item['sell_price'] * self.rng.uniform(0.8, 1.5))),
+                'duration': 1,
+            })
+    
+    def market_buy(self):
+        _, body = self.request('GET', '/market/')
+        listing_id = self._pick(BUY_LINK, body)
+        if listing_id:
+            self.request('POST', f'/market/buy/{listing_id}/')
+
+def parse_mix(value):
+    """
+    Parse an action mix such as "train=3,crime=4"
+    Returns: dict of action name -> weight
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action: {name}")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name}: {weight}")
+    
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one action with a positive weight")
+    
+    return mix
+
+class Command(BaseCommand):
+    help = "Simulate concurrent players and report throughput, latency and error rates per endpoint"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--players', type=int, default=20,
+            help="Number of concurrent simulated players"
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help="Seconds to run for"
+        )
+        parser.add_argument(
+            '--url',
+            help="Base URL of a running server (e.g. http://127.0.0.1:8000); "
+                 "defaults to running in process with the Django test client"
+        )
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help=f"Relative weights of the actions {', '.join(ACTIONS)} (default: {DEFAULT_MIX})"
+        )
+        parser.add_argument(
+            '--think-min', type=int, default=100,
+            help="Minimum think time between actions in milliseconds"
+        )
+        parser.add_argument(
+            '--think-max', type=int, default=500,
+            help="Maximum think time between actions in milliseconds"
+        )
+        parser.add_argument(
+            '--prefix', default='loadtest_',
+            help="Username prefix of the simulated players"
+        )
+        parser.add_argument(
+            '--password', default='loadtest-password',
+            help="Password of the simulated players"
+        )
+        parser.add_argument(
+            '--location',
+            help="Name of the location to put the players in (defaults to the first non-safe zone)"
+        )
+        parser.add_argument(
+            '--no-setup', action='store_true',
+            help="Use the existing players as they are (e.g. when the server uses another database)"
+        )
+        parser.add_argument(
+            '--seed', type=int,
+            help="Random seed for reproducible runs"
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        if options['players'] < 1:
+            raise CommandError("--players must be at least 1")
+        
+        usernames = [f"{options['prefix']}{i}" for i in range(options['players'])]
+        if not options['no_setup']:
+            self.setup_players(usernames, options['password'], options['location'])
+        
+        # Release the main thread's connection before the players open theirs
+        connection.close()
+        
+        stats = LoadStats()
+        rng = random.Random(options['seed'])
+        think_time = (options['think_min'] / 1000, options['think_max'] / 1000)
+        
+        players = []
+        for username in usernames:
+            session = HttpSession(options['url']) if options['url'] else ClientSession()
+            players.append(SimulatedPlayer(
+                session, username, options['password'], stats, mix, think_time,
+                random.Random(rng.random())
+            ))
+        
+        target = options['url'] or 'the in-process test client'
+        self.stdout.write(f"Running {len(players)} players for {options['duration']}s against {target}")
+        
+        started = time.monotonic()
+        deadline = started + options['duration']
+        threads = [
+            threading.Thread(target=player.run, args=(deadline,), name=player.username)
+            for player in players
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.report(stats.rows(time.monotonic() - started))
+    
+    def setup_players(self, usernames, password, location_name):
+        """Create the simulated players and get them ready to play"""
+        if location_name:
+            location = Location.objects.filter(name=location_name).first()
+            if location is None:
+                raise CommandError(f"Unknown location: {location_name}")
+        else:
+            location = Location.objects.filter(is_safe_zone=False, min_level__lte=1).order_by('id').first()
+            if location is None:
+                raise CommandError("No location where players can fight; load the game fixtures first")
+        
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        hashed = make_password(password)
+        for username in usernames:
+            if username not in existing:
+                # The post_save signal creates the player
+                User.objects.create(username=username, password=hashed)
+        User.objects.filter(username__in=usernames).update(password=hashed)
+        
+        players = Player.objects.filter(user__username__in=usernames)
+        players.update(
+            current_location=location,
+            is_in_hospital=False,
+            hospital_release_time=None,
+            is_in_jail=False,
+            jail_release_time=None,
+            cash=100000,
+        )
+        
+        # Stock every player with tradable items to list on the market
+        items = list(Item.objects.filter(is_tradable=True)[:3])
+        PlayerInventory.objects.bulk_create([
+            PlayerInventory(player_id=player_id, item=item, quantity=100)
+            for player_id in players.values_list('id', flat=True)
+            for item in items
+        ], ignore_conflicts=True)
+        
+        self.stdout.write(f"Prepared {len(usernames)} players in {location.name}")
+    
+    def report(self, rows):
+        if not rows:
+            self.stdout.write("No requests were made")
+            return
+        
+        header = f"{'endpoint':<32} {'requests':>8} {'errors':>7} {'err %':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<32} {row['requests']:>8} {row['errors']:>7} {row['error_rate']:>6.1f} "
+                f"{row['throughput']:>7.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f}"
+            )
+        
+        total = sum(row['requests'] for row in rows)
+        errors = sum(row['errors'] for row in rows)
+        throughput = sum(row['throughput'] for row in rows)
+        self.stdout.write('-' * len(header))
+        self.stdout.write(f"{'total':<32} {total:>8} {errors:>7} {errors / total * 100:>6.1f} {throughput:>7.1f}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from game.models import CrimeStats
+
+class Command(BaseCommand):
+    help = "Recompute the per-player crime statistics from the crime results"
+    
+    def handle(self, *args, **options):
+        rows = CrimeStats.rebuild()
+        self.stdout.write(f"Rebuilt {rows} crime stats rows")
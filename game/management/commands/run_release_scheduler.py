@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from game.services.release_service import ReleaseScheduler, release_due_players
+
+class Command(BaseCommand):
+    help = "Release players from hospital and jail at their exact release time"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lookahead', type=int, default=60,
+            help="Seconds of upcoming releases to load from the database at a time"
+        )
+        parser.add_argument(
+            '--refill-interval', type=int, default=5,
+            help="Seconds between reads of new releases from the database"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Maximum number of players released per UPDATE"
+        )
+    
+    def handle(self, *args, **options):
+        # Catch up on anything that fell due while the scheduler was down
+        released = release_due_players(batch_size=options['batch_size'])
+        self.stdout.write(f"Released {released} overdue players")
+        
+        scheduler = ReleaseScheduler(
+            lookahead=options['lookahead'],
+            refill_interval=options['refill_interval'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write("Release scheduler running, press CTRL+C to stop")
+        
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
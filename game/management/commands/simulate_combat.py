@@ -0,0 +1,123 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from game.services import combat_engine_service as engine
+from game.services.crime_simulation_service import STATS, PlayerPopulation
+from game.services.opponent_index_service import LEVEL_RANGE
+
+class Command(BaseCommand):
+    help = "Simulate fights between generated players for balancing (nothing is written)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fights', type=int, default=1_000_000,
+            help="Number of fights to simulate"
+        )
+        parser.add_argument(
+            '--players', type=int, default=10000,
+            help="Size of the player population"
+        )
+        parser.add_argument(
+            '--sample', action='store_true',
+            help="Sample the population from the live players (stats only, without equipment)"
+        )
+        parser.add_argument(
+            '--max-level', type=int, default=30,
+            help="Highest level of generated players"
+        )
+        parser.add_argument(
+            '--stat-mean', type=float, default=10,
+            help="Mean stat of generated level 1 players"
+        )
+        parser.add_argument(
+            '--stat-growth', type=float, default=2.0,
+            help="Mean stat gained per level by generated players"
+        )
+        parser.add_argument(
+            '--equipment', type=float, default=1.0,
+            help="Mean attack and defense bonus from equipment per level of generated players"
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Random seed for reproducible results"
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Print the results as JSON"
+        )
+    
+    def handle(self, *args, **options):
+        if options['fights'] < 1 or options['players'] < 2:
+            raise CommandError("Need at least 1 fight and 2 players")
+        
+        rng = np.random.default_rng(options['seed'])
+        try:
+            if options['sample']:
+                population = PlayerPopulation.sample(options['players'], rng)
+                equipment = np.zeros((len(population), 2))
+            else:
+                population = PlayerPopulation.synthetic(
+                    options['players'], rng,
+                    max_level=options['max_level'],
+                    stat_mean=options['stat_mean'],
+                    stat_growth=options['stat_growth']
+                )
+                equipment = rng.poisson(options['equipment'] * population.levels[:, None], (len(population), 2))
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        stats = dict(zip(STATS, population.stats.astype(np.int64).T))
+        attack = engine.attack_power(stats['strength'], stats['dexterity'], stats['speed'], equipment[:, 0])
+        defense = engine.defense_power(stats['defense'], stats['dexterity'], stats['speed'], equipment[:, 1])
+        # Players start with 100 health and gain 10 per level
+        max_health = 100 + 10 * (population.levels - 1)
+        
+        # Attackers pick defenders within the opponent level range
+        started = time.perf_counter()
+        attackers = rng.integers(0, len(population), options['fights'])
+        by_level = np.argsort(population.levels, kind='stable')
+        sorted_levels = population.levels[by_level]
+        low = np.searchsorted(sorted_levels, population.levels[attackers] - LEVEL_RANGE, side='left')
+        high = np.searchsorted(sorted_levels, population.levels[attackers] + LEVEL_RANGE, side='right')
+        defenders = by_level[low + (rng.random(len(attackers)) * (high - low)).astype(np.int64)]
+        
+        won, damage, _, _ = engine.resolve_fights(attack[attackers], defense[defenders], rng)
+        # Hits like this one that would knock out a defender at full health
+        hits_to_knockout = np.ceil(max_health[defenders] / damage)
+        elapsed = time.perf_counter() - started
+        
+        gaps = population.levels[attackers] - population.levels[defenders]
+        results = []
+        for gap in range(-LEVEL_RANGE, LEVEL_RANGE + 1):
+            fights = gaps == gap
+            count = int(fights.sum())
+            if not count:
+                continue
+            wins = won & fights
+            losses = ~won & fights
+            results.append({
+                'level_gap': gap,
+                'fights': count,
+                'win_rate': float(wins.sum() / count),
+                'mean_damage': float(damage[wins].mean()) if wins.any() else 0.0,
+                'mean_counter_damage': float(damage[losses].mean()) if losses.any() else 0.0,
+                'hits_to_knockout': float(hits_to_knockout[wins].mean()) if wins.any() else 0.0,
+            })
+        
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        
+        self.stdout.write(
+            f"Simulated {len(attackers):,} fights between {len(population):,} players in {elapsed:.2f}s"
+        )
+        self.stdout.write(f"{'Level gap':>10}{'Fights':>11}{'Win rate':>10}{'Damage':>8}{'Counter':>9}{'Hits to KO':>12}")
+        for result in results:
+            self.stdout.write(
+                f"{result['level_gap']:>+10}{result['fights']:>11,}{result['win_rate']:>10.1%}"
+                f"{result['mean_damage']:>8.1f}{result['mean_counter_damage']:>9.1f}"
+                f"{result['hits_to_knockout']:>12.1f}"
+            )
@@ -0,0 +1,137 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from game.services import crime_simulation_service as simulation
+
+class Command(BaseCommand):
+    help = "Monte Carlo simulation of the crime types for balancing (nothing is written)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--attempts', type=int, default=1_000_000,
+            help="Attempts simulated per crime type"
+        )
+        parser.add_argument(
+            '--crime', type=int, action='append', dest='crimes',
+            help="Only simulate this crime type ID (repeatable)"
+        )
+        parser.add_argument(
+            '--players', type=int, default=10000,
+            help="Size of the player population"
+        )
+        parser.add_argument(
+            '--sample', action='store_true',
+            help="Sample the population from the live players instead of generating it"
+        )
+        parser.add_argument(
+            '--min-level', type=int, default=1,
+            help="Lowest level of generated players"
+        )
+        parser.add_argument(
+            '--max-level', type=int, default=30,
+            help="Highest level of generated players"
+        )
+        parser.add_argument(
+            '--stat-mean', type=float, default=10,
+            help="Mean stat of generated level 1 players"
+        )
+        parser.add_argument(
+            '--stat-growth', type=float, default=2.0,
+            help="Mean stat gained per level by generated players"
+        )
+        parser.add_argument(
+            '--hours', type=int, default=72,
+            help="Hours of play for the level progression curve (0 to skip)"
+        )
+        parser.add_argument(
+            '--step-hours', type=int, default=12,
+            help="Hours between points of the progression curve"
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Random seed for reproducible results"
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Print the results as JSON"
+        )
+    
+    def handle(self, *args, **options):
+        if options['attempts'] < 1 or options['players'] < 1:
+            raise CommandError("--attempts and --players must be at least 1")
+        if options['step_hours'] < 1:
+            raise CommandError("--step-hours must be at least 1")
+        
+        rng = np.random.default_rng(options['seed'])
+        crime_types = simulation.load_crime_types(options['crimes'])
+        if not crime_types:
+            raise CommandError("No crime types to simulate; load the game fixtures first")
+        
+        try:
+            if options['sample']:
+                population = simulation.PlayerPopulation.sample(options['players'], rng)
+            else:
+                population = simulation.PlayerPopulation.synthetic(
+                    options['players'], rng,
+                    min_level=options['min_level'],
+                    max_level=options['max_level'],
+                    stat_mean=options['stat_mean'],
+                    stat_growth=options['stat_growth']
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        started = time.perf_counter()
+        results = []
+        for crime_type in crime_types:
+            result = simulation.simulate_crime_type(crime_type, population, options['attempts'], rng)
+            if result is not None:
+                results.append(result)
+        crimes_elapsed = time.perf_counter() - started
+        
+        curve = []
+        if options['hours'] > 0:
+            started = time.perf_counter()
+            start = simulation.PlayerPopulation.synthetic(
+                options['players'], rng, min_level=1, max_level=1,
+                stat_mean=options['stat_mean'], stat_growth=0
+            ) if not options['sample'] else population
+            curve = simulation.simulate_progression(
+                crime_types, start, options['hours'], rng, options['step_hours']
+            )
+            curve_elapsed = time.perf_counter() - started
+        
+        if options['json']:
+            self.stdout.write(json.dumps({'crimes': results, 'progression': curve}, indent=2))
+            return
+        
+        attempts = options['attempts'] * len(results)
+        self.stdout.write(
+            f"Simulated {attempts:,} attempts over {len(results)} crime types "
+            f"by {len(population):,} players in {crimes_elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"{'Crime':<24}{'Success':>8}{'Jailed':>8}{'$/energy':>10}{'XP/energy':>10}"
+            f"{'$/hour':>10}{'XP/hour':>9}{'Jail min/h':>11}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['name'][:23]:<24}{result['success_rate']:>8.1%}{result['jail_rate']:>8.1%}"
+                f"{result['cash_per_energy']:>10.1f}{result['exp_per_energy']:>10.2f}"
+                f"{result['cash_per_hour']:>10.0f}{result['exp_per_hour']:>9.1f}"
+                f"{result['jail_minutes_per_hour']:>11.1f}"
+            )
+        
+        if curve:
+            who = "sampled players" if options['sample'] else "new level 1 players"
+            self.stdout.write("")
+            self.stdout.write(
+                f"Level progression of {len(population):,} {who} "
+                f"committing their best crime ({curve_elapsed:.2f}s)"
+            )
+            self.stdout.write(f"{'Hour':>6}{'Mean':>8}{'p10':>6}{'p50':>6}{'p90':>6}")
+            for hour, mean, p10, p50, p90 in curve:
+                self.stdout.write(f"{hour:>6}{mean:>8.2f}{p10:>6.0f}{p50:>6.0f}{p90:>6.0f}")
@@ -0,0 +1,147 @@
+"""
+Per-view performance metrics: SQL query count and time, render time,
+total latency and response size, kept over a rolling window per URL name.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, float('inf'))
+
+def query_budget(max_queries):
+    """
+    Declare the maximum number of SQL queries a view may run per request.
+    Requests over budget are counted in the view's metrics, and
+    game.testing.assert_query_budget fails on them.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+class RequestSample:
+    """
+    Measurements for a single request
+    """
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.response_size = 0
+        self.budget = None
+    
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+    
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+def percentile(values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+def _histogram(values, buckets):
+    counts = [0] * len(buckets)
+    for value in values:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+    return {('+inf' if bound == float('inf') else str(bound)): count for bound, count in zip(buckets, counts)}
+
+class ViewMetrics:
+    """
+    Rolling window of request samples per URL name (thread-safe)
+    """
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._requests = defaultdict(int)
+        self._over_budget = defaultdict(int)
+        self._lock = threading.Lock()
+    
+    def record(self, name, sample):
+        with self._lock:
+            self._samples[name].append((
+                sample.queries,
+                sample.sql_time * 1000,
+                sample.render_time * 1000,
+                sample.total_time * 1000,
+                sample.response_size,
+            ))
+            self._requests[name] += 1
+            if sample.over_budget:
+                self._over_budget[name] += 1
+    
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+            self._over_budget.clear()
+    
+    def summary(self):
+        """
+        Summarise the current window for every URL name
+        Returns: dict keyed by URL name
+        """
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+            requests = dict(self._requests)
+            over_budget = dict(self._over_budget)
+        
+        summary = {}
+        for name, samples in snapshot.items():
+            queries = sorted(s[0] for s in samples)
+            sql_ms = sorted(s[1] for s in samples)
+            render_ms = sorted(s[2] for s in samples)
+            total_ms = sorted(s[3] for s in samples)
+            sizes = sorted(s[4] for s in samples)
+            
+            summary[name] = {
+                'requests': requests.get(name, 0),
+                'over_budget': over_budget.get(name, 0),
+                'window': len(samples),
+                'queries': {
+                    'mean': round(sum(queries) / len(queries), 2),
+                    'p95': percentile(queries, 95),
+                    'max': queries[-1],
+                    'histogram': _histogram(queries, QUERY_BUCKETS),
+                },
+                'sql_ms': {
+                    'mean': round(sum(sql_ms) / len(sql_ms), 2),
+                    'p95': round(percentile(sql_ms, 95), 2),
+                },
+                'render_ms': {
+                    'mean': round(sum(render_ms) / len(render_ms), 2),
+                    'p95': round(percentile(render_ms, 95), 2),
+                },
+                'total_ms': {
+                    'p50': round(percentile(total_ms, 50), 2),
+                    'p95': round(percentile(total_ms, 95), 2),
+                    'p99': round(percentile(total_ms, 99), 2),
+                    'histogram': _histogram(total_ms, LATENCY_BUCKETS_MS),
+                },
+                'response_bytes': {
+                    'mean': int(sum(sizes) / len(sizes)),
+                    'max': sizes[-1],
+                },
+            }
+        
+        return summary
+
+# Metrics for this process
+view_metrics = ViewMetrics()
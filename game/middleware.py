@@ -1,30 +1,112 @@
+import time
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.http import Http404
+
+from game.metrics import RequestSample, view_metrics
+from game.models import Player
+from game.services.release_service import release_if_due
+
+class PlayerIdentityMap:
+    """
+    Request-scoped identity map for players
+    Each player row is loaded at most once per request and every caller
+    gets the same instance back
+    """
+    def __init__(self):
+        self._players = {}
+    
+    def add(self, player):
+        """Register an already loaded player and return the canonical instance"""
+        return self._players.setdefault(player.id, player)
+    
+    def get(self, player_id):
+        """Get a player by id, loading it with its location on first use"""
+        player = self._players.get(player_id)
+        if player is None:
+            player = self.add(
+                Player.objects.select_related('current_location', 'user').get(id=player_id)
+            )
+        return player
+    
+    def get_or_404(self, player_id):
+        """Like get(), but raise Http404 for unknown players"""
+        try:
+            return self.get(player_id)
+        except Player.DoesNotExist:
+            raise Http404("No Player matches the given query.")
 
 class PlayerMiddleware(MiddlewareMixin):
     """
-    Middleware to check and update player status on each request
+    Middleware to attach the player to each request and bring its
+    derived state (status, energy, health) up to date. Hospital and jail
+    releases are normally made by the release scheduler; a release that is
+    already due is made here, which only costs queries in that case.
     """
     def process_request(self, request):
+        request.players = PlayerIdentityMap()
+        
         if not hasattr(request, 'user') or isinstance(request.user, AnonymousUser):
             return
-            
+        
         # Only continue if the user is authenticated
         if request.user.is_authenticated:
             try:
-                # Get the player instance
-                player = request.user.player
+                # Load the player and its location in one query
+                player = Player.objects.select_related('current_location').get(user=request.user)
                 
-                # Assign player to request
-                request.player = player
+                # Link both sides of the one-to-one so request.user.player
+                # and player.user reuse these instances
+                Player.user.field.set_cached_value(player, request.user)
+                User.player.related.set_cached_value(request.user, player)
                 
-                # Check if player is in hospital or jail
-                player.check_status()
+                # Assign player to request
+                request.player = request.players.add(player)
                 
-                # Regenerate energy and health
-                player.regenerate_energy()
-                player.regenerate_health()
+                # Release the player if the scheduler has not done it yet
+                release_if_due(player)
                 
+                # Apply energy and health regeneration in memory only;
+                # it is written back when a resource is spent
+                player.sync_resources()
+            
             except (AttributeError, Exception):
                 # User might not have a player profile yet
                 pass
+
+class ViewMetricsMiddleware:
+    """
+    Middleware recording query count, SQL time, render time, total time and
+    response size for each request, keyed by URL name
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        sample = RequestSample()
+        request.metrics = sample
+        started = time.perf_counter()
+        
+        with connection.execute_wrapper(sample.record_query):
+            response = self.get_response(request)
+        
+        sample.total_time = time.perf_counter() - started
+        if not response.streaming:
+            sample.response_size = len(response.content)
+        
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            sample.budget = getattr(match.func, 'query_budget', None)
+            view_metrics.record(match.view_name, sample)
+        
+        return response
+    
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+        
+        def rendered(response):
+            request.metrics.render_time = time.perf_counter() - started
+        
+        response.add_post_render_callback(rendered)
+        return response
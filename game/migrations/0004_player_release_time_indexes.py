@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_crimetype_crimeresult'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_in_hospital', True)), fields=['hospital_release_time'], name='player_hospital_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_in_jail', True)), fields=['jail_release_time'], name='player_jail_release_idx'),
+        ),
+    ]
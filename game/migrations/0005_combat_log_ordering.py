@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_player_release_time_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='combatlog',
+            options={'ordering': ['timestamp', 'id']},
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:42
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_equipment_totals(apps, schema_editor):
+    Player = apps.get_model('game', 'Player')
+    PlayerInventory = apps.get_model('game', 'PlayerInventory')
+    
+    totals = PlayerInventory.objects.filter(is_equipped=True).values('player_id').annotate(
+        attack=Sum('item__attack_power'),
+        defense=Sum('item__defense_power'),
+        speed=Sum('item__speed_bonus'),
+    )
+    for row in totals:
+        Player.objects.filter(id=row['player_id']).update(
+            equipped_attack=row['attack'] or 0,
+            equipped_defense=row['defense'] or 0,
+            equipped_speed=row['speed'] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('game', '0005_combat_log_ordering'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='equipped_attack',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='equipped_defense',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='equipped_speed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_equipment_totals, migrations.RunPython.noop),
+    ]
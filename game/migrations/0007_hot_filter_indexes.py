@@ -0,0 +1,37 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_player_equipment_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='combat',
+            index=models.Index(fields=['attacker', 'started_at'], name='combat_attacker_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crimeresult',
+            index=models.Index(fields=['player', 'created_at'], name='crime_player_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crimeresult',
+            index=models.Index(fields=['player', 'crime_type', 'result'], name='crime_player_type_result_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlisting',
+            index=models.Index(fields=['status', 'expires_at'], name='market_status_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlisting',
+            index=models.Index(fields=['status', 'item', 'price'], name='market_status_item_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['current_location', 'is_in_hospital', 'is_in_jail', 'level'], name='player_opponents_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+
+def backfill_crime_stats(apps, schema_editor):
+    CrimeResult = apps.get_model('game', 'CrimeResult')
+    CrimeStats = apps.get_model('game', 'CrimeStats')
+    
+    totals = CrimeResult.objects.order_by().values('player_id', 'crime_type_id').annotate(
+        attempts=Count('id'),
+        successes=Count('id', filter=Q(result='success')),
+        failures=Count('id', filter=Q(result='failed')),
+        jailings=Count('id', filter=Q(result='jailed')),
+        cash_earned=Sum('cash_reward'),
+        exp_earned=Sum('exp_reward'),
+    )
+    CrimeStats.objects.bulk_create([CrimeStats(**row) for row in totals], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('game', '0007_hot_filter_indexes'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='CrimeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('jailings', models.PositiveIntegerField(default=0)),
+                ('cash_earned', models.BigIntegerField(default=0)),
+                ('exp_earned', models.BigIntegerField(default=0)),
+                ('crime_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='game.crimetype')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crime_stats', to='game.player')),
+            ],
+            options={
+                'verbose_name': 'Crime Stats',
+                'verbose_name_plural': 'Crime Stats',
+                'db_table': 'game_crime_stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='crimestats',
+            constraint=models.UniqueConstraint(fields=('player', 'crime_type'), name='crime_stats_player_type_unique'),
+        ),
+        migrations.RunPython(backfill_crime_stats, migrations.RunPython.noop),
+    ]
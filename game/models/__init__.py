@@ -5,4 +5,4 @@ from .item import Item, ItemType, PlayerInventory
 from .property import Property, PropertyType
 from .combat import Combat, CombatLog
 from .market import MarketListing
-from .crime import CrimeType, CrimeResult
+from .crime import CrimeType, CrimeResult, CrimeStats
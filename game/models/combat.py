@@ -2,7 +2,9 @@ from django.db import models
 from django.utils import timezone
 import random
 
-class Combat(models.Model):
+from .unit_of_work import TrackedModel, unit_of_work
+
+class Combat(TrackedModel):
     """
     Represents a combat encounter between players
     """
@@ -46,6 +48,7 @@ class Combat(models.Model):
     def __str__(self):
         return f"{self.attacker.nickname} vs {self.defender.nickname}"
     
+    @unit_of_work()
     def start_combat(self):
         """
         Start the combat and process results
@@ -65,13 +68,12 @@ class Combat(models.Model):
         if self.location and self.location.is_safe_zone:
             return [], "You cannot attack in a safe zone"
             
-        # Check if attacker has enough energy
-        if attacker.energy < 5:
+        # Check if attacker has enough energy and reduce it
+        if not attacker.spend_energy(5):
             return [], "Not enough energy to attack"
             
-        # Reduce attacker's energy
-        attacker.energy -= 5
-        attacker.save()
+        attacker.save(update_fields=['energy', 'last_energy_refill'])
+        defender.sync_resources()
         
         # Combat log to track actions
         combat_log = []
@@ -81,15 +83,10 @@ class Combat(models.Model):
         attack_value = attacker.strength * 2 + attacker.dexterity + attacker.speed
         defense_value = defender.defense * 2 + defender.dexterity + defender.speed
         
-        # Add equipment bonuses
-        attack_items = attacker.inventory.filter(is_equipped=True)
-        for item in attack_items:
-            attack_value += item.item.attack_power
-            
-        defense_items = defender.inventory.filter(is_equipped=True)
-        for item in defense_items:
-            defense_value += item.item.defense_power
-            
+        # Add equipment bonuses (totals kept on the player)
+        attack_value += attacker.equipped_attack
+        defense_value += defender.equipped_defense
+        
         # Add randomness
         attack_roll = random.randint(1, 20)
         defense_roll = random.randint(1, 20)
@@ -109,12 +106,11 @@ class Combat(models.Model):
             damage = max(5, damage)
             
             # Apply damage to defender
-            defender.health -= damage
+            defender.take_damage(damage)
             combat_log.append(f"{attacker.nickname} hits for {damage} damage!")
             
-            # If defender health drops to zero or below, send them to hospital
+            # If defender health drops to zero, send them to hospital
             if defender.health <= 0:
-                defender.health = 0
                 defender.is_in_hospital = True
                 defender.hospital_release_time = timezone.now() + timezone.timedelta(minutes=30)
                 combat_log.append(f"{defender.nickname} has been hospitalized!")
@@ -140,12 +136,11 @@ class Combat(models.Model):
             damage = max(3, damage)  # Ensure minimum counter-damage
             
             # Apply counter-damage to attacker
-            attacker.health -= damage
+            attacker.take_damage(damage)
             combat_log.append(f"{defender.nickname} counters for {damage} damage!")
             
-            # If attacker health drops to zero or below, send them to hospital
+            # If attacker health drops to zero, send them to hospital
             if attacker.health <= 0:
-                attacker.health = 0
                 attacker.is_in_hospital = True
                 attacker.hospital_release_time = timezone.now() + timezone.timedelta(minutes=20)
                 combat_log.append(f"{attacker.nickname} has been hospitalized!")
@@ -164,17 +159,16 @@ class Combat(models.Model):
         defender.save()
         
         # Create combat log entries
-        for entry in combat_log:
-            CombatLog.objects.create(
-                combat=self,
-                message=entry,
-                timestamp=timezone.now()
-            )
+        CombatLog.record(self, combat_log)
         
         return combat_log, result_message
     
     class Meta:
         db_table = 'game_combat'
+        indexes = [
+            # A player's recent attacks
+            models.Index(fields=['attacker', 'started_at'], name='combat_attacker_started_idx'),
+        ]
 
 class CombatLog(models.Model):
     """
@@ -190,7 +184,20 @@ class CombatLog(models.Model):
     
     class Meta:
         db_table = 'game_combat_log'
-        ordering = ['timestamp']
+        # Entries of one fight share a timestamp, so the ID keeps them in order
+        ordering = ['timestamp', 'id']
     
     def __str__(self):
         return f"{self.combat}: {self.message[:50]}..."
+    
+    @classmethod
+    def record(cls, combat, messages):
+        """
+        Save a fight's log messages with a single INSERT
+        Returns: list of CombatLog objects
+        """
+        timestamp = timezone.now()
+        return cls.objects.bulk_create([
+            cls(combat=combat, message=message, timestamp=timestamp)
+            for message in messages
+        ])
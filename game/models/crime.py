@@ -1,7 +1,7 @@
 """
 Models for crime-related game features.
 """
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 import random
 
@@ -109,4 +109,112 @@ class CrimeResult(models.Model):
     
     class Meta:
         db_table = 'game_crime_result'
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # A player's recent crimes
+            models.Index(fields=['player', 'created_at'], name='crime_player_created_idx'),
+            # A player's results per crime type
+            models.Index(fields=['player', 'crime_type', 'result'], name='crime_player_type_result_idx'),
+        ] 
+
+class CrimeStats(models.Model):
+    """
+    Running totals of a player's results for one crime type, updated as
+    crimes are committed
+    """
+    player = models.ForeignKey(
+        'game.Player',
+        on_delete=models.CASCADE,
+        related_name='crime_stats'
+    )
+    crime_type = models.ForeignKey(
+        CrimeType,
+        on_delete=models.CASCADE,
+        related_name='player_stats'
+    )
+    
+    attempts = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    jailings = models.PositiveIntegerField(default=0)
+    cash_earned = models.BigIntegerField(default=0)
+    exp_earned = models.BigIntegerField(default=0)
+    
+    # Counter for each result value
+    RESULT_COUNTERS = {
+        'success': 'successes',
+        'failed': 'failures',
+        'jailed': 'jailings',
+    }
+    
+    def __str__(self):
+        return f"{self.player_id} - {self.crime_type_id}: {self.attempts} attempts"
+    
+    @property
+    def success_rate(self):
+        return round(self.successes / self.attempts * 100, 1) if self.attempts else 0
+    
+    @classmethod
+    def record(cls, result):
+        """Add a crime result to its player's totals"""
+        increments = {
+            'attempts': models.F('attempts') + 1,
+            'cash_earned': models.F('cash_earned') + result.cash_reward,
+            'exp_earned': models.F('exp_earned') + result.exp_reward,
+        }
+        counter = cls.RESULT_COUNTERS.get(result.result)
+        if counter:
+            increments[counter] = models.F(counter) + 1
+        
+        rows = cls.objects.filter(player_id=result.player_id, crime_type_id=result.crime_type_id)
+        if rows.update(**increments):
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    player_id=result.player_id,
+                    crime_type_id=result.crime_type_id,
+                    attempts=1,
+                    cash_earned=result.cash_reward,
+                    exp_earned=result.exp_reward,
+                    **({counter: 1} if counter else {})
+                )
+        except IntegrityError:
+            # Created by a concurrent crime in the meantime
+            rows.update(**increments)
+    
+    @classmethod
+    def rebuild(cls, player=None):
+        """
+        Recompute the totals from CrimeResult
+        Returns: number of stats rows written
+        """
+        results = CrimeResult.objects.all()
+        stats = cls.objects.all()
+        if player is not None:
+            results = results.filter(player=player)
+            stats = stats.filter(player=player)
+        
+        totals = results.order_by().values('player_id', 'crime_type_id').annotate(
+            attempts=models.Count('id'),
+            successes=models.Count('id', filter=models.Q(result='success')),
+            failures=models.Count('id', filter=models.Q(result='failed')),
+            jailings=models.Count('id', filter=models.Q(result='jailed')),
+            cash_earned=models.Sum('cash_reward'),
+            exp_earned=models.Sum('exp_reward'),
+        )
+        
+        with transaction.atomic():
+            stats.delete()
+            created = cls.objects.bulk_create([cls(**row) for row in totals])
+        
+        return len(created)
+    
+    class Meta:
+        db_table = 'game_crime_stats'
+        verbose_name = 'Crime Stats'
+        verbose_name_plural = 'Crime Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'crime_type'], name='crime_stats_player_type_unique'),
+        ]
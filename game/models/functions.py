@@ -0,0 +1,50 @@
+"""
+Database functions for computing time-based game state inside SQL.
+
+Both SQLite (development) and PostgreSQL (production) are supported.
+"""
+from django.db.models import DateTimeField, Func, IntegerField, Value
+
+
+class ElapsedSeconds(Func):
+    """
+    Whole seconds elapsed between a datetime expression and `now`
+    """
+    output_field = IntegerField()
+    template = "CAST(FLOOR(EXTRACT(EPOCH FROM (%(expressions)s))) AS INTEGER)"
+    arg_joiner = " - "
+
+    def __init__(self, expression, now, **extra):
+        # Expressions are ordered (now, start) so the joiner reads `now - start`
+        super().__init__(Value(now, output_field=DateTimeField()), expression, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # julianday() is a float; round to the milliseconds it keeps before
+        # truncating, or whole seconds can come out one short
+        return self.as_sql(
+            compiler, connection,
+            template="(CAST(ROUND(86400000 * (julianday(%(expressions)s))) AS INTEGER) / 1000)",
+            arg_joiner=") - julianday(",
+            **extra_context
+        )
+
+
+class AddSeconds(Func):
+    """
+    A datetime expression shifted forward by an integer number of seconds
+    """
+    output_field = DateTimeField()
+    template = "(%(expressions)s)"
+    arg_joiner = " + INTERVAL '1 second' * "
+
+    def __init__(self, expression, seconds, **extra):
+        super().__init__(expression, seconds, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Keep the format Django writes so the column stays parseable
+        return self.as_sql(
+            compiler, connection,
+            template="strftime('%%%%Y-%%%%m-%%%%d %%%%H:%%%%M:%%%%f', %(expressions)s || ' seconds')",
+            arg_joiner=", '+' || ",
+            **extra_context
+        )
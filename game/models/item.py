@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
 
+from .unit_of_work import TrackedModel, unit_of_work
+
 class ItemType(models.Model):
     """
     Represents different types of items in the game
@@ -46,8 +48,13 @@ class Item(models.Model):
     
     class Meta:
         db_table = 'game_item'
+    
+    @property
+    def equipment_bonus(self):
+        """(attack, defense, speed) added to a player while equipped"""
+        return self.attack_power, self.defense_power, self.speed_bonus
 
-class PlayerInventory(models.Model):
+class PlayerInventory(TrackedModel):
     """
     Represents items owned by players
     """
@@ -66,7 +73,36 @@ class PlayerInventory(models.Model):
     
     def __str__(self):
         return f"{self.player.nickname}'s {self.item.name} (x{self.quantity})"
+    
+    @classmethod
+    def add_quantities(cls, quantities):
+        """
+        Add item quantities to many inventories with a single upsert
+        (supported by PostgreSQL and SQLite)
+        
+        Args:
+            quantities: dict of (player_id, item_id) -> quantity to add
+        """
+        if not quantities:
+            return
         
+        quote = connection.ops.quote_name
+        table = quote(cls._meta.db_table)
+        rows = ', '.join(['(%s, %s, %s, %s)'] * len(quantities))
+        params = []
+        for (player_id, item_id), quantity in quantities.items():
+            params += [player_id, item_id, quantity, False]
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({quote('player_id')}, {quote('item_id')}, {quote('quantity')}, {quote('is_equipped')}) "
+                f"VALUES {rows} "
+                f"ON CONFLICT ({quote('player_id')}, {quote('item_id')}) "
+                f"DO UPDATE SET {quote('quantity')} = {table}.{quote('quantity')} + EXCLUDED.{quote('quantity')}",
+                params
+            )
+        
+    @unit_of_work()
     def use_item(self):
         """
         Use a consumable item
@@ -79,6 +115,7 @@ class PlayerInventory(models.Model):
             return False, "You don't have any of this item"
             
         player = self.player
+        player.sync_resources()
         
         # Apply item effects
         if self.item.energy_restore > 0:
@@ -98,6 +135,7 @@ class PlayerInventory(models.Model):
             
         return True, f"You used {self.item.name}"
     
+    @unit_of_work()
     def equip(self):
         """
         Equip an item
@@ -109,19 +147,30 @@ class PlayerInventory(models.Model):
         if self.is_equipped:
             return False, "This item is already equipped"
             
+        attack, defense, speed = self.item.equipment_bonus
+        
         # Unequip any items of the same type
-        PlayerInventory.objects.filter(
-            player=self.player,
-            item__item_type=self.item.item_type,
+        replaced = PlayerInventory.objects.filter(
+            player_id=self.player_id,
+            item__item_type_id=self.item.item_type_id,
             is_equipped=True
-        ).update(is_equipped=False)
+        )
+        for other_attack, other_defense, other_speed in replaced.values_list(
+            'item__attack_power', 'item__defense_power', 'item__speed_bonus'
+        ):
+            attack -= other_attack
+            defense -= other_defense
+            speed -= other_speed
+        replaced.update(is_equipped=False)
         
         # Equip this item
         self.is_equipped = True
         self.save()
+        self.player.add_equipment_bonus(attack, defense, speed)
         
         return True, f"You equipped {self.item.name}"
     
+    @unit_of_work()
     def unequip(self):
         """
         Unequip an item
@@ -133,4 +182,14 @@ class PlayerInventory(models.Model):
         self.is_equipped = False
         self.save()
         
+        attack, defense, speed = self.item.equipment_bonus
+        self.player.add_equipment_bonus(-attack, -defense, -speed)
+        
         return True, f"You unequipped {self.item.name}"
+    
+    def delete(self, *args, **kwargs):
+        # Removing an equipped item takes its bonus off the player
+        if self.is_equipped:
+            attack, defense, speed = self.item.equipment_bonus
+            self.player.add_equipment_bonus(-attack, -defense, -speed)
+        return super().delete(*args, **kwargs)
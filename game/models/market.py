@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
-class MarketListing(models.Model):
+from .unit_of_work import TrackedModel, unit_of_work
+
+class MarketListing(TrackedModel):
     """
     Represents an item listing on the marketplace
     """
@@ -51,6 +53,7 @@ class MarketListing(models.Model):
     def __str__(self):
         return f"{self.quantity}x {self.item.name} for ${self.price}"
     
+    @unit_of_work()
     def purchase(self, buyer):
         """
         Process a purchase of this listing
@@ -59,20 +62,37 @@ class MarketListing(models.Model):
         if self.status != 'active':
             return False, "This listing is no longer active"
             
-        if buyer.id == self.seller.id:
+        if buyer.id == self.seller_id:
             return False, "You cannot buy your own listing"
             
-        if buyer.cash < self.price:
-            return False, "You don't have enough cash"
-            
-        # Process the transaction
-        buyer.cash -= self.price
-        self.seller.cash += self.price
+        from game.services import ledger_service
         
-        # Update the listing
-        self.status = 'sold'
-        self.buyer = buyer
-        self.sold_at = timezone.now()
+        with transaction.atomic():
+            # Claim the listing first so it can only be sold once
+            self.status = 'sold'
+            self.buyer = buyer
+            self.sold_at = timezone.now()
+            
+            claimed = MarketListing.objects.filter(id=self.id, status='active').update(
+                status=self.status,
+                buyer=buyer,
+                sold_at=self.sold_at
+            )
+            if not claimed:
+                self.refresh_from_db(fields=['status', 'buyer', 'sold_at'])
+                return False, "This listing is no longer active"
+            
+            # Process the transaction
+            if not ledger_service.spend_cash(buyer, self.price):
+                transaction.set_rollback(True)
+                self.status, self.buyer, self.sold_at = 'active', None, None
+                return False, "You don't have enough cash"
+            
+            ledger_service.credit_cash(self.seller_id, self.price)
+            self.mark_clean('status', 'buyer', 'sold_at')
+            
+            from game.services import order_book_service
+            order_book_service.listing_removed(self.id)
         
         # Add the item to buyer's inventory
         from game.models.item import PlayerInventory
@@ -87,10 +107,6 @@ class MarketListing(models.Model):
         # Add the quantity
         inventory.quantity += self.quantity
         
-        # Save all changes
-        buyer.save()
-        self.seller.save()
-        self.save()
         inventory.save()
         
         return True, f"Successfully purchased {self.quantity}x {self.item.name}"
@@ -107,6 +123,9 @@ class MarketListing(models.Model):
         self.status = 'cancelled'
         self.save()
         
+        from game.services import order_book_service
+        order_book_service.listing_removed(self.id)
+        
         # Return the item to seller's inventory
         from game.models.item import PlayerInventory
         
@@ -134,6 +153,9 @@ class MarketListing(models.Model):
             self.status = 'expired'
             self.save()
             
+            from game.services import order_book_service
+            order_book_service.listing_removed(self.id)
+            
             # Return the item to seller's inventory
             from game.models.item import PlayerInventory
             
@@ -152,3 +174,9 @@ class MarketListing(models.Model):
     
     class Meta:
         db_table = 'game_market_listing'
+        indexes = [
+            # Active listings by expiry (expiry processing, order book load)
+            models.Index(fields=['status', 'expires_at'], name='market_status_expires_idx'),
+            # Cheapest active listings of an item
+            models.Index(fields=['status', 'item', 'price'], name='market_status_item_price_idx'),
+        ]
@@ -4,7 +4,9 @@ from django.conf import settings
 from django.contrib.auth.models import User  # Temporarily use Django's User model
 import random
 
-class Player(models.Model):
+from .unit_of_work import TrackedModel, unit_of_work
+
+class Player(TrackedModel):
     """
     Player model representing a user's in-game character
     """
@@ -32,6 +34,11 @@ class Player(models.Model):
     health = models.PositiveIntegerField(default=100)
     max_health = models.PositiveIntegerField(default=100)
     
+    # Totals of equipped item bonuses, kept up to date by PlayerInventory
+    equipped_attack = models.IntegerField(default=0)
+    equipped_defense = models.IntegerField(default=0)
+    equipped_speed = models.IntegerField(default=0)
+    
     # Location
     current_location = models.ForeignKey(
         'Location', 
@@ -76,68 +83,188 @@ class Player(models.Model):
         self.save()
         return False
     
+    # Regeneration intervals (seconds per point)
+    ENERGY_REGEN_INTERVAL = 300
+    HEALTH_REGEN_INTERVAL = 600
+    
+    @staticmethod
+    def _regenerated(value, maximum, last_refill, interval, now):
+        """
+        Apply time-based regeneration to a stored resource value
+        Returns: (value, last_refill) as they would be at `now`
+        """
+        if value >= maximum:
+            return value, last_refill
+            
+        points = int((now - last_refill).total_seconds() // interval)
+        if points <= 0:
+            return value, last_refill
+            
+        if value + points >= maximum:
+            return maximum, last_refill
+            
+        # Keep partial progress toward the next point
+        return value + points, last_refill + timezone.timedelta(seconds=points * interval)
+    
+    @property
+    def current_energy(self):
+        """Energy including regeneration since the last refill (read-only)"""
+        return self._regenerated(
+            self.energy, self.max_energy, self.last_energy_refill,
+            self.ENERGY_REGEN_INTERVAL, timezone.now()
+        )[0]
+    
+    @property
+    def current_health(self):
+        """Health including regeneration since the last refill (read-only)"""
+        return self._regenerated(
+            self.health, self.max_health, self.last_health_refill,
+            self.HEALTH_REGEN_INTERVAL, timezone.now()
+        )[0]
+    
+    def sync_resources(self, now=None):
+        """
+        Bring energy and health up to date in memory without saving
+        Returns: list of changed field names (for update_fields)
+        """
+        if now is None:
+            now = timezone.now()
+            
+        changed = []
+        energy, last_energy_refill = self._regenerated(
+            self.energy, self.max_energy, self.last_energy_refill,
+            self.ENERGY_REGEN_INTERVAL, now
+        )
+        if energy != self.energy:
+            self.energy = energy
+            self.last_energy_refill = last_energy_refill
+            changed += ['energy', 'last_energy_refill']
+            
+        health, last_health_refill = self._regenerated(
+            self.health, self.max_health, self.last_health_refill,
+            self.HEALTH_REGEN_INTERVAL, now
+        )
+        if health != self.health:
+            self.health = health
+            self.last_health_refill = last_health_refill
+            changed += ['health', 'last_health_refill']
+            
+        return changed
+    
+    def spend_energy(self, amount, now=None):
+        """
+        Deduct energy in memory after applying regeneration; the caller saves
+        Returns: True if the player had enough energy
+        """
+        if now is None:
+            now = timezone.now()
+            
+        self.sync_resources(now)
+        if self.energy < amount:
+            return False
+            
+        # Regeneration is idle while full, so restart the clock from now
+        if self.energy >= self.max_energy:
+            self.last_energy_refill = now
+            
+        self.energy -= amount
+        return True
+    
+    def take_damage(self, amount, now=None):
+        """
+        Deduct health in memory after applying regeneration; the caller saves
+        Returns: remaining health (never below zero)
+        """
+        if now is None:
+            now = timezone.now()
+            
+        self.sync_resources(now)
+        if self.health >= self.max_health:
+            self.last_health_refill = now
+            
+        self.health = max(0, self.health - amount)
+        return self.health
+    
+    def fields_written(self, field_names):
+        """Push written status fields to WebSocket clients, the opponent index and the page cache"""
+        from ..services import opponent_index_service, page_cache_service
+        from ..services.status_service import status_changed
+        status_changed(self, field_names)
+        page_cache_service.player_state_changed(self.id)
+        
+        # Keep the player's place in the opponent index current
+        if any(field in field_names or f'{field}_id' in field_names for field in opponent_index_service.INDEX_FIELDS):
+            opponent_index_service.player_changed(self)
+    
+    def add_equipment_bonus(self, attack=0, defense=0, speed=0):
+        """Adjust the equipped item totals (negative amounts remove bonuses)"""
+        if not (attack or defense or speed):
+            return
+        
+        Player.objects.filter(id=self.id).update(
+            equipped_attack=models.F('equipped_attack') + attack,
+            equipped_defense=models.F('equipped_defense') + defense,
+            equipped_speed=models.F('equipped_speed') + speed
+        )
+        
+        self.equipped_attack += attack
+        self.equipped_defense += defense
+        self.equipped_speed += speed
+        self.mark_clean('equipped_attack', 'equipped_defense', 'equipped_speed')
+    
     def regenerate_energy(self):
         """Regenerate energy based on time passed since last refill"""
-        now = timezone.now()
-        time_diff = now - self.last_energy_refill
-        
-        # Energy regenerates at a rate of 1 per 5 minutes
-        energy_to_add = min(
-            self.max_energy - self.energy,
-            time_diff.total_seconds() // 300
+        energy, self.last_energy_refill = self._regenerated(
+            self.energy, self.max_energy, self.last_energy_refill,
+            self.ENERGY_REGEN_INTERVAL, timezone.now()
         )
         
-        if energy_to_add > 0:
-            self.energy += int(energy_to_add)
-            self.last_energy_refill = now - timezone.timedelta(
-                seconds=(time_diff.total_seconds() % 300)
-            )
-            self.save()
+        if energy != self.energy:
+            self.energy = energy
+            self.save(update_fields=['energy', 'last_energy_refill'])
     
     def regenerate_health(self):
         """Regenerate health based on time passed since last refill"""
-        now = timezone.now()
-        time_diff = now - self.last_health_refill
-        
-        # Health regenerates at a rate of 1 per 10 minutes
-        health_to_add = min(
-            self.max_health - self.health,
-            time_diff.total_seconds() // 600
+        health, self.last_health_refill = self._regenerated(
+            self.health, self.max_health, self.last_health_refill,
+            self.HEALTH_REGEN_INTERVAL, timezone.now()
         )
         
-        if health_to_add > 0:
-            self.health += int(health_to_add)
-            self.last_health_refill = now - timezone.timedelta(
-                seconds=(time_diff.total_seconds() % 600)
-            )
-            self.save()
+        if health != self.health:
+            self.health = health
+            self.save(update_fields=['health', 'last_health_refill'])
             
     def check_status(self):
-        """Check and update player status (hospital, jail)"""
+        """
+        Check and update player status (hospital, jail)
+        Only writes when the player is actually released
+        """
         now = timezone.now()
+        changed = []
         
         if self.is_in_hospital and now >= self.hospital_release_time:
             self.is_in_hospital = False
             self.health = self.max_health
             self.hospital_release_time = None
+            changed += ['is_in_hospital', 'health', 'hospital_release_time']
         
         if self.is_in_jail and now >= self.jail_release_time:
             self.is_in_jail = False
             self.jail_release_time = None
+            changed += ['is_in_jail', 'jail_release_time']
             
-        if self.is_in_hospital or self.is_in_jail:
-            self.save()
+        if changed:
+            self.save(update_fields=changed)
     
+    @unit_of_work()
     def train_stat(self, stat_name, energy_cost=5):
         """Train a specific stat"""
-        if self.energy < energy_cost:
-            return False, "Not enough energy"
-            
         if stat_name not in ['strength', 'defense', 'speed', 'dexterity', 'intelligence']:
             return False, "Invalid stat name"
             
-        # Deduct energy
-        self.energy -= energy_cost
+        # Deduct energy (regenerated up to now)
+        if not self.spend_energy(energy_cost):
+            return False, "Not enough energy"
         
         # Increase the stat
         current_value = getattr(self, stat_name)
@@ -151,3 +278,21 @@ class Player(models.Model):
     
     class Meta:
         db_table = 'game_player'
+        indexes = [
+            # Pending releases, ordered by due time, for the release scheduler
+            models.Index(
+                fields=['hospital_release_time'],
+                condition=models.Q(is_in_hospital=True),
+                name='player_hospital_release_idx'
+            ),
+            models.Index(
+                fields=['jail_release_time'],
+                condition=models.Q(is_in_jail=True),
+                name='player_jail_release_idx'
+            ),
+            # Available opponents at a location
+            models.Index(
+                fields=['current_location', 'is_in_hospital', 'is_in_jail', 'level'],
+                name='player_opponents_idx'
+            ),
+        ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.functions import Cast, Least
 from django.utils import timezone
 
+from .functions import ElapsedSeconds
+from .unit_of_work import TrackedModel, unit_of_work
+
 class PropertyType(models.Model):
     """
     Represents different types of properties players can own
@@ -23,7 +27,7 @@ class PropertyType(models.Model):
         db_table = 'game_property_type'
         verbose_name_plural = 'property types'
 
-class Property(models.Model):
+class Property(TrackedModel):
     """
     Represents a specific instance of a property owned by a player
     """
@@ -62,9 +66,34 @@ class Property(models.Model):
     # Timestamps
     purchased_on = models.DateTimeField(default=timezone.now)
     
+    # Income stops accruing after this many days without a collection
+    INCOME_CAP_DAYS = 7
+    
+    # Per upgrade: cost as a share of the current value, income and value growth
+    UPGRADE_COST_FACTOR = 0.5
+    UPGRADE_INCOME_FACTOR = 1.2
+    UPGRADE_VALUE_FACTOR = 1.15
+    
     def __str__(self):
         return f"{self.name} ({self.property_type.name})"
     
+    @classmethod
+    def accrued_income(cls, now):
+        """
+        Build an expression for the income a property has accrued at `now`,
+        matching collect_income (whole dollars, capped at INCOME_CAP_DAYS)
+        """
+        seconds = Least(
+            ElapsedSeconds(models.F('last_income_collection'), now),
+            models.Value(cls.INCOME_CAP_DAYS * 86400)
+        )
+        # Multiply as bigint: a daily rate times a week of seconds overflows
+        # a PostgreSQL integer
+        return (
+            Cast('income_rate', models.BigIntegerField()) *
+            Cast(seconds, models.BigIntegerField()) / 86400
+        )
+    
     def collect_income(self):
         """
         Collect accumulated income from the property
@@ -76,16 +105,17 @@ class Property(models.Model):
         now = timezone.now()
         time_diff = now - self.last_income_collection
         
-        # Calculate income based on time passed (max 7 days)
-        days_passed = min(time_diff.days + (time_diff.seconds / 86400), 7)
-        income = int(self.income_rate * days_passed)
+        # Calculate income based on time passed (max 7 days), in whole
+        # seconds and integer arithmetic like accrued_income
+        seconds = min(time_diff.days * 86400 + time_diff.seconds, self.INCOME_CAP_DAYS * 86400)
+        income = self.income_rate * seconds // 86400
         
         if income <= 0:
             return 0, "No income to collect yet"
             
         # Update the player's balance
-        self.player.cash += income
-        self.player.save()
+        from game.services import ledger_service
+        ledger_service.credit_cash(self.player, income)
         
         # Update the last income collection time
         self.last_income_collection = now
@@ -93,22 +123,22 @@ class Property(models.Model):
         
         return income, f"Collected ${income} from {self.name}"
         
+    @unit_of_work()
     def upgrade(self, cost):
         """
         Upgrade the property to increase income
         Returns: (success, message)
         """
-        if self.player.cash < cost:
+        from game.services import ledger_service
+        
+        # Check and deduct cash in one statement
+        if not ledger_service.spend_cash(self.player, cost):
             return False, "Not enough cash"
             
-        # Deduct cash
-        self.player.cash -= cost
-        self.player.save()
-        
         # Upgrade property
         self.level += 1
-        self.income_rate = int(self.income_rate * 1.2)  # 20% increase per level
-        self.current_value = int(self.current_value * 1.15)  # 15% increase in value
+        self.income_rate = int(self.income_rate * self.UPGRADE_INCOME_FACTOR)  # 20% increase per level
+        self.current_value = int(self.current_value * self.UPGRADE_VALUE_FACTOR)  # 15% increase in value
         self.save()
         
         return True, f"Successfully upgraded {self.name} to level {self.level}"
@@ -0,0 +1,188 @@
+"""
+Dirty-field tracking and unit-of-work support for game models.
+
+Inside a unit of work, save() on a tracked model that already exists in the
+database is deferred. When the outermost unit of work exits, each pending
+row is written once with only the columns that actually changed.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.db import models, transaction
+
+_current = ContextVar('unit_of_work', default=None)
+
+class TrackedModel(models.Model):
+    """
+    Abstract model that remembers the field values it was loaded or saved with
+    """
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+    
+    def _field_values(self):
+        # Deferred fields are not loaded, so they cannot be dirty
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+        }
+    
+    def _take_snapshot(self):
+        self._snapshot = self._field_values()
+    
+    def _update_snapshot(self, field_names):
+        snapshot = getattr(self, '_snapshot', None)
+        if snapshot is None:
+            return
+        for name in field_names:
+            attname = self._meta.get_field(name).attname
+            snapshot[attname] = getattr(self, attname)
+    
+    def mark_clean(self, *field_names):
+        """Record fields as already written (e.g. by a queryset update)"""
+        self._update_snapshot(field_names)
+        self.fields_written(field_names)
+    
+    def copy_state(self, other):
+        """
+        Take over the field values of another instance of the same row
+        (e.g. one reloaded under a lock), including which of them are written
+        """
+        if other is self:
+            return
+        for attname, value in other._field_values().items():
+            setattr(self, attname, value)
+        self._snapshot = dict(getattr(other, '_snapshot', {}))
+    
+    def fields_written(self, field_names):
+        """Called after the named fields of an existing row were written"""
+    
+    def get_dirty_fields(self):
+        """
+        Get the names of fields changed since the last load or save
+        Returns: list of field names (suitable for update_fields)
+        """
+        snapshot = getattr(self, '_snapshot', {})
+        return [
+            self._meta.get_field(attname).name
+            for attname, value in self._field_values().items()
+            if attname not in snapshot or snapshot[attname] != value
+        ]
+    
+    def save(self, *args, **kwargs):
+        uow = _current.get()
+        if uow is not None and not self._state.adding and not kwargs.get('force_insert'):
+            # Written when the unit of work commits
+            uow.register(self)
+            return
+        
+        written = None
+        if not self._state.adding:
+            written = kwargs.get('update_fields') or self.get_dirty_fields()
+        
+        super().save(*args, **kwargs)
+        self._take_snapshot()
+        if written:
+            self.fields_written(written)
+    
+    def delete(self, *args, **kwargs):
+        uow = _current.get()
+        if uow is not None:
+            uow.discard(self)
+        return super().delete(*args, **kwargs)
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields:
+            self._update_snapshot(fields)
+        else:
+            self._take_snapshot()
+
+class UnitOfWork(ContextDecorator):
+    """
+    Collects saves of tracked models during a game action and flushes them
+    as one minimal UPDATE per row inside a transaction
+    
+    Can be used as a context manager or a decorator. Nested units of work
+    join the outermost one. Nothing is written if the block raises.
+    """
+    def __init__(self):
+        self._pending = {}
+        self._token = None
+        self._atomic = None
+    
+    def register(self, instance):
+        """Defer saving an instance until commit"""
+        key = (type(instance), instance.pk)
+        pending = self._pending.get(key)
+        
+        # A second copy of the same row: write the first one now so later
+        # reads from the database see it
+        if pending is not None and pending is not instance:
+            self._write(pending)
+        
+        self._pending[key] = instance
+    
+    def discard(self, instance):
+        """Forget a pending instance (e.g. because it is being deleted)"""
+        self._pending.pop((type(instance), instance.pk), None)
+    
+    def flush(self):
+        """
+        Write every pending instance
+        Returns: number of UPDATE statements issued
+        """
+        pending, self._pending = self._pending, {}
+        return sum(self._write(instance) for instance in pending.values())
+    
+    def _write(self, instance):
+        dirty = instance.get_dirty_fields()
+        if not dirty:
+            return 0
+        super(TrackedModel, instance).save(update_fields=dirty)
+        instance._take_snapshot()
+        instance.fields_written(dirty)
+        return 1
+    
+    def __enter__(self):
+        outer = _current.get()
+        if outer is not None:
+            return outer
+        
+        self._atomic = transaction.atomic()
+        self._atomic.__enter__()
+        self._token = _current.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._token is None:
+            return False
+        
+        atomic, self._atomic = self._atomic, None
+        try:
+            if exc_type is None:
+                self.flush()
+        except BaseException as error:
+            exc_type, exc_value, traceback = type(error), error, error.__traceback__
+            raise
+        finally:
+            self._pending = {}
+            _current.reset(self._token)
+            self._token = None
+            atomic.__exit__(exc_type, exc_value, traceback)
+        
+        return False
+    
+    def _recreate_cm(self):
+        # Each decorated call gets its own unit of work
+        return UnitOfWork()
+
+def unit_of_work():
+    """Start a unit of work (context manager or decorator)"""
+    return UnitOfWork()
@@ -10,6 +10,8 @@ from .models import (
 class PlayerSerializer(serializers.ModelSerializer):
     """Serializer for Player model"""
     username = serializers.CharField(source='user.username', read_only=True)
+    energy = serializers.IntegerField(source='current_energy', read_only=True)
+    health = serializers.IntegerField(source='current_health', read_only=True)
     
     class Meta:
         model = Player
@@ -20,6 +20,7 @@ from .market_service import (
     cancel_listing,
     purchase_listing,
     get_expired_listings,
+    expire_listings,
     process_expired_listings
 )
 
@@ -38,5 +39,36 @@ from .crime_service import (
     calculate_success_chance,
     get_recent_crimes,
     get_crime_stats,
+    get_crime_type_stats,
     notify_player
 )
+
+from .release_service import (
+    get_pending_releases,
+    release_players,
+    release_due_players,
+    release_if_due
+)
+from .notification_service import (
+    notify,
+    get_outbox
+)
+
+from .status_service import (
+    serialize_status,
+    current_status,
+    send_delta
+)
+
+from .routing_service import (
+    plan_route,
+    get_route_graph
+)
+
+from .combat_engine_service import (
+    run_fights
+)
+
+from .reference_data_service import (
+    get_reference_data
+)
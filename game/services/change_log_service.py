@@ -0,0 +1,121 @@
+"""
+Change log service module for keeping in-memory structures current across
+processes.
+
+A process that changes an in-memory structure (the opponent index, the
+market order book) appends the change to a log in the shared cache under a
+version counter. Every process replays the changes it has not seen yet, so
+keeping current costs work proportional to the changes rather than a full
+reload. A full reload is only needed on first use, when a process has
+fallen further behind than the log keeps, or when a change is missing.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+# Seconds a change is kept in the shared log
+CHANGE_TIMEOUT = 600
+
+# Most changes replayed at once; a process further behind reloads instead
+MAX_REPLAY = 5000
+
+# Seconds a change may be missing from the log (published but not yet
+# written) before a full reload is asked for
+MISSING_CHANGE_GRACE = 5
+
+def _initial_version():
+    # A lost version must not restart at a number a process has seen
+    return time.time_ns() // 1000
+
+class ChangeLog:
+    """
+    A log of changes in the shared cache, named by its key prefix
+    """
+    def __init__(self, name):
+        self.version_key = f'{name}_version'
+        self.change_key = f'{name}_change:{{}}'
+    
+    def version(self):
+        """Get the number of the last published change"""
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, _initial_version(), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+    
+    def publish(self, changes):
+        """
+        Append changes to the log once the transaction commits
+        
+        Args:
+            changes: List of picklable changes, applied in order by readers
+        """
+        if not changes:
+            return
+        
+        def publish():
+            try:
+                last = cache.incr(self.version_key, len(changes))
+            except ValueError:
+                cache.add(self.version_key, _initial_version(), timeout=None)
+                last = cache.incr(self.version_key, len(changes))
+            first = last - len(changes) + 1
+            cache.set_many({
+                self.change_key.format(first + offset): change
+                for offset, change in enumerate(changes)
+            }, timeout=CHANGE_TIMEOUT)
+        
+        transaction.on_commit(publish)
+    
+    def reader(self):
+        """Get a reader following this log"""
+        return ChangeLogReader(self)
+
+class ChangeLogReader:
+    """
+    Position of one in-memory structure in a change log
+    """
+    def __init__(self, log):
+        self.log = log
+        self.version = None
+        self._missing_since = None
+    
+    def reset(self):
+        """Follow the log from now on (call before a full reload)"""
+        self.version = self.log.version()
+        self._missing_since = None
+    
+    def pending(self):
+        """
+        Get the changes published since the last call, in order
+        
+        Returns:
+            List of changes, or None if a full reload is needed instead
+        """
+        if self.version is None:
+            return None
+        
+        version = self.log.version()
+        if version == self.version:
+            return []
+        if version < self.version or version - self.version > MAX_REPLAY:
+            return None
+        
+        numbers = range(self.version + 1, version + 1)
+        found = cache.get_many([self.log.change_key.format(number) for number in numbers])
+        changes = []
+        for number in numbers:
+            change = found.get(self.log.change_key.format(number))
+            if change is None:
+                # Not written yet, or expired from the log
+                now = time.monotonic()
+                if self._missing_since is None:
+                    self._missing_since = now
+                elif now - self._missing_since > MISSING_CHANGE_GRACE:
+                    return None
+                break
+            changes.append(change)
+            self.version = number
+            self._missing_since = None
+        
+        return changes
@@ -0,0 +1,424 @@
+"""
+Combat engine service module for resolving fights in bulk.
+
+Tournaments, NPC raids and balance testing need thousands of fights at once.
+Fighters are loaded into NumPy arrays with one query and the fights are
+resolved with the rules of combat_service.process_combat (d20 rolls, the /2
+and /3 damage divisors, minimum damage, the 10-20% steal and experience with
+Player.gain_experience level-ups) for a whole round at a time. The results
+are written back with bulk UPDATEs and INSERTs.
+"""
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.db import connection
+from django.utils import timezone
+
+from ..models.combat import Combat, CombatLog
+from ..models.player import Player
+from ..models.unit_of_work import unit_of_work
+from . import opponent_index_service, page_cache_service
+from .combat_service import locked_players
+from .status_service import status_changed
+
+# Minimum damage of a win and of a counter-attack
+MIN_DAMAGE = 5
+MIN_COUNTER_DAMAGE = 3
+
+# Hospital stay of a defender knocked out by a win, and of an attacker
+# knocked out by a counter-attack
+KNOCKOUT_MINUTES = 30
+COUNTER_KNOCKOUT_MINUTES = 20
+
+FIGHTER_FIELDS = (
+    'id', 'nickname', 'level', 'experience', 'cash',
+    'strength', 'defense', 'speed', 'dexterity',
+    'equipped_attack', 'equipped_defense',
+    'health', 'max_health', 'last_health_refill',
+    'energy', 'max_energy', 'last_energy_refill',
+    'is_in_hospital', 'is_in_jail', 'current_location_id',
+)
+
+# Columns written back for every player that fought
+WRITTEN_FIELDS = [
+    'level', 'experience', 'cash',
+    'health', 'max_health', 'last_health_refill',
+    'energy', 'max_energy', 'last_energy_refill',
+    'is_in_hospital', 'hospital_release_time',
+]
+
+def attack_power(strength, dexterity, speed, equipped_attack):
+    """Attack value of a fighter before the d20 roll (scalars or arrays)"""
+    return strength * 2 + dexterity + speed + equipped_attack
+
+def defense_power(defense, dexterity, speed, equipped_defense):
+    """Defense value of a fighter before the d20 roll (scalars or arrays)"""
+    return defense * 2 + dexterity + speed + equipped_defense
+
+def resolve_fights(attack, defense, rng):
+    """
+    Roll a batch of fights.
+    
+    Args:
+        attack: int array of attacker attack powers
+        defense: int array of defender defense powers (same length)
+        rng: numpy.random.Generator
+    
+    Returns:
+        tuple: (won, damage, attack_value, defense_value) arrays, where won
+        is True where the attacker won and damage is dealt to the loser
+    """
+    size = len(attack)
+    attack_value = attack + rng.integers(1, 21, size)
+    defense_value = defense + rng.integers(1, 21, size)
+    
+    won = attack_value > defense_value
+    damage = np.where(
+        won,
+        np.maximum(MIN_DAMAGE, (attack_value - defense_value) // 2),
+        np.maximum(MIN_COUNTER_DAMAGE, (defense_value - attack_value) // 3)
+    )
+    return won, damage, attack_value, defense_value
+
+def steal_cash(cash, rng):
+    """Cash taken from knocked out defenders (10-20% of what they carry)"""
+    return (cash * rng.uniform(0.1, 0.2, len(cash))).astype(np.int64)
+
+def schedule_rounds(attackers, defenders):
+    """
+    Split fights into rounds in which every player fights at most once,
+    keeping each player's fights in their original order
+    
+    Returns: int array with the round of each fight
+    """
+    next_round = {}
+    rounds = np.empty(len(attackers), dtype=np.int64)
+    for i, (attacker, defender) in enumerate(zip(attackers, defenders)):
+        fight_round = max(next_round.get(attacker, 0), next_round.get(defender, 0))
+        rounds[i] = fight_round
+        next_round[attacker] = next_round[defender] = fight_round + 1
+    return rounds
+
+def _to_datetime64(values):
+    return np.array([value.astimezone(dt_timezone.utc).replace(tzinfo=None) for value in values], dtype='datetime64[us]')
+
+def _to_datetimes(values):
+    return [None if value is None else value.replace(tzinfo=dt_timezone.utc) for value in values.tolist()]
+
+def _regenerated(value, maximum, last_refill, interval, now):
+    """Vectorized Player._regenerated; returns (value, last_refill)"""
+    interval = np.timedelta64(interval, 's')
+    points = (now - last_refill) // interval
+    regenerating = (value < maximum) & (points > 0)
+    capped = regenerating & (value + points >= maximum)
+    partial = regenerating & ~capped
+    
+    value = np.where(capped, maximum, np.where(partial, value + points, value))
+    last_refill = np.where(partial, last_refill + points * interval, last_refill)
+    return value, last_refill
+
+class Fighters:
+    """
+    Columns of a set of players as NumPy arrays, indexed by row
+    """
+    def __init__(self, rows):
+        """
+        Args:
+            rows: Tuples of FIGHTER_FIELDS values
+        """
+        columns = list(zip(*rows)) if rows else [()] * len(FIGHTER_FIELDS)
+        data = dict(zip(FIGHTER_FIELDS, columns))
+        
+        self.ids = np.array(data['id'], dtype=np.int64)
+        self.nicknames = list(data['nickname'])
+        self.location_ids = list(data['current_location_id'])
+        self.rows = {player_id: row for row, player_id in enumerate(data['id'])}
+        
+        for field in ('level', 'experience', 'cash', 'health', 'max_health', 'energy', 'max_energy'):
+            setattr(self, field, np.array(data[field], dtype=np.int64))
+        for field in ('is_in_hospital', 'is_in_jail'):
+            setattr(self, field, np.array(data[field], dtype=bool))
+        self.last_health_refill = _to_datetime64(data['last_health_refill'])
+        self.last_energy_refill = _to_datetime64(data['last_energy_refill'])
+        self.hospital_release_time = np.full(len(self.ids), np.datetime64('NaT'), dtype='datetime64[us]')
+        
+        stats = {
+            field: np.array(data[field], dtype=np.int64)
+            for field in ('strength', 'defense', 'speed', 'dexterity', 'equipped_attack', 'equipped_defense')
+        }
+        self.attack = attack_power(stats['strength'], stats['dexterity'], stats['speed'], stats['equipped_attack'])
+        self.defense = defense_power(stats['defense'], stats['dexterity'], stats['speed'], stats['equipped_defense'])
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @classmethod
+    def load(cls, player_ids):
+        """Lock and load players for the rest of the transaction"""
+        return cls(list(locked_players(player_ids).values_list(*FIGHTER_FIELDS)))
+    
+    def sync_resources(self, now):
+        """Vectorized Player.sync_resources at `now` (a datetime64)"""
+        self.energy, self.last_energy_refill = _regenerated(
+            self.energy, self.max_energy, self.last_energy_refill,
+            Player.ENERGY_REGEN_INTERVAL, now
+        )
+        self.health, self.last_health_refill = _regenerated(
+            self.health, self.max_health, self.last_health_refill,
+            Player.HEALTH_REGEN_INTERVAL, now
+        )
+    
+    def take_damage(self, rows, damage, now):
+        """Vectorized Player.take_damage (resources already synced)"""
+        full = self.health[rows] >= self.max_health[rows]
+        self.last_health_refill[rows[full]] = now
+        self.health[rows] = np.maximum(0, self.health[rows] - damage)
+    
+    def gain_experience(self, rows, amount):
+        """Vectorized Player.gain_experience: at most one level per gain"""
+        self.experience[rows] += amount
+        needed = self.level[rows] * 100
+        level_up = self.experience[rows] >= needed
+        
+        up = rows[level_up]
+        self.experience[up] -= needed[level_up]
+        self.level[up] += 1
+        self.max_energy[up] += 5
+        self.max_health[up] += 10
+        self.energy[up] = self.max_energy[up]
+        self.health[up] = self.max_health[up]
+    
+    def fight(self, attackers, defenders, rng, now):
+        """
+        Resolve one round of fights in which every row appears at most once
+        
+        Args:
+            attackers: int array of attacker rows
+            defenders: int array of defender rows
+            rng: numpy.random.Generator
+            now: datetime64 of the fights
+        
+        Returns:
+            Dictionary of per-fight result arrays
+        """
+        won, damage, attack_value, defense_value = resolve_fights(
+            self.attack[attackers], self.defense[defenders], rng
+        )
+        losers = np.where(won, defenders, attackers)
+        self.take_damage(losers, damage, now)
+        
+        knocked_out = self.health[losers] <= 0
+        hospitalized = losers[knocked_out]
+        self.is_in_hospital[hospitalized] = True
+        self.hospital_release_time[hospitalized] = now + np.where(
+            won[knocked_out],
+            np.timedelta64(KNOCKOUT_MINUTES, 'm'),
+            np.timedelta64(COUNTER_KNOCKOUT_MINUTES, 'm')
+        )
+        
+        # Only a win that knocks the defender out takes their cash
+        robbed = won & knocked_out
+        cash_stolen = np.zeros(len(won), dtype=np.int64)
+        cash_stolen[robbed] = steal_cash(self.cash[defenders[robbed]], rng)
+        self.cash[defenders] -= cash_stolen
+        self.cash[attackers] += cash_stolen
+        
+        # Experience uses the levels from before the fight
+        experience = np.where(won, 10 + self.level[defenders] * 2, 5 + self.level[attackers])
+        self.gain_experience(np.where(won, attackers, defenders), experience)
+        
+        return {
+            'won': won,
+            'damage': damage,
+            'attack_value': attack_value,
+            'defense_value': defense_value,
+            'knocked_out': knocked_out,
+            'cash_stolen': cash_stolen,
+            'experience': experience,
+        }
+    
+    def players(self, rows):
+        """Unsaved Player objects holding the written columns of some rows"""
+        release_times = _to_datetimes(self.hospital_release_time[rows])
+        health_refills = _to_datetimes(self.last_health_refill[rows])
+        energy_refills = _to_datetimes(self.last_energy_refill[rows])
+        
+        players = []
+        for i, row in enumerate(rows.tolist()):
+            players.append(Player(
+                id=int(self.ids[row]),
+                nickname=self.nicknames[row],
+                current_location_id=self.location_ids[row],
+                level=int(self.level[row]),
+                experience=int(self.experience[row]),
+                cash=int(self.cash[row]),
+                health=int(self.health[row]),
+                max_health=int(self.max_health[row]),
+                last_health_refill=health_refills[i],
+                energy=int(self.energy[row]),
+                max_energy=int(self.max_energy[row]),
+                last_energy_refill=energy_refills[i],
+                is_in_hospital=bool(self.is_in_hospital[row]),
+                hospital_release_time=release_times[i],
+                is_in_jail=bool(self.is_in_jail[row]),
+            ))
+        return players
+
+def _write_players(players):
+    """
+    Write WRITTEN_FIELDS of many players with one UPDATE ... FROM (VALUES ...)
+    per batch (supported by PostgreSQL and SQLite); bulk_update builds a
+    CASE expression per row and field, which is much slower
+    """
+    quote = connection.ops.quote_name
+    table = quote(Player._meta.db_table)
+    fields = [Player._meta.get_field(name) for name in WRITTEN_FIELDS]
+    
+    # Both databases name the VALUES columns column1, column2, ...
+    assignments = []
+    for i, field in enumerate(fields, start=2):
+        value = f'v.column{i}'
+        if connection.vendor == 'postgresql':
+            # A column of NULLs would otherwise be typed as text
+            value = f'CAST({value} AS {field.cast_db_type(connection)})'
+        assignments.append(f'{quote(field.column)} = {value}')
+    
+    row = '(' + ', '.join(['%s'] * (len(fields) + 1)) + ')'
+    size = connection.ops.bulk_batch_size(['id'] + WRITTEN_FIELDS, players)
+    
+    with connection.cursor() as cursor:
+        for start in range(0, len(players), size):
+            batch = players[start:start + size]
+            params = []
+            for player in batch:
+                params.append(player.id)
+                params += [field.get_db_prep_save(getattr(player, field.attname), connection) for field in fields]
+            
+            cursor.execute(
+                f"UPDATE {table} SET {', '.join(assignments)} "
+                f"FROM (VALUES {', '.join([row] * len(batch))}) AS v "
+                f"WHERE {table}.{quote('id')} = v.column1",
+                params
+            )
+
+def _log_messages(attacker, defender, result, i):
+    """The log lines process_combat writes for fight `i` of a round"""
+    messages = [
+        f"{attacker} attacks {defender}!",
+        f"{attacker} attack value: {result['attack_value'][i]}",
+        f"{defender} defense value: {result['defense_value'][i]}",
+    ]
+    damage = result['damage'][i]
+    experience = result['experience'][i]
+    
+    if result['won'][i]:
+        messages.append(f"{attacker} hits for {damage} damage!")
+        if result['knocked_out'][i]:
+            messages.append(f"{defender} has been hospitalized!")
+            if result['cash_stolen'][i] > 0:
+                messages.append(f"{attacker} stole ${result['cash_stolen'][i]}!")
+        messages.append(f"{attacker} gained {experience} experience!")
+    else:
+        messages.append(f"{defender} counters for {damage} damage!")
+        if result['knocked_out'][i]:
+            messages.append(f"{attacker} has been hospitalized!")
+        messages.append(f"{defender} gained {experience} experience from defending!")
+    
+    return messages
+
+@unit_of_work()
+def run_fights(pairs, location=None, rng=None, now=None, logs=True):
+    """
+    Resolve many fights and write the results back in bulk.
+    
+    Fights are resolved in order: a player who fights several times does so
+    with the health, cash and level left by their earlier fights. As in
+    initiate_combat, fights with a player who is in hospital or jail at that
+    point are skipped. No energy is charged; callers decide on entry costs.
+    
+    Args:
+        pairs: Iterable of (attacker ID, defender ID) tuples
+        location: Optional Location model instance the fights happen at
+        rng: Optional numpy.random.Generator
+        now: Optional timezone-aware datetime (defaults to now)
+        logs: Whether to write combat log entries
+    
+    Returns:
+        tuple: (list of Combat objects, number of skipped fights)
+    """
+    if location is not None and location.is_safe_zone:
+        raise ValueError("You cannot fight in a safe zone.")
+    if rng is None:
+        rng = np.random.default_rng()
+    if now is None:
+        now = timezone.now()
+    
+    pairs = [(attacker_id, defender_id) for attacker_id, defender_id in pairs if attacker_id != defender_id]
+    if not pairs:
+        return [], 0
+    
+    fighters = Fighters.load({player_id for pair in pairs for player_id in pair})
+    
+    # Fights with players that no longer exist are skipped too
+    found = [pair for pair in pairs if pair[0] in fighters.rows and pair[1] in fighters.rows]
+    skipped = len(pairs) - len(found)
+    pairs = found
+    attackers = np.array([fighters.rows[attacker_id] for attacker_id, _ in pairs], dtype=np.int64)
+    defenders = np.array([fighters.rows[defender_id] for _, defender_id in pairs], dtype=np.int64)
+    
+    now64 = _to_datetime64([now])[0]
+    fighters.sync_resources(now64)
+    
+    rounds = schedule_rounds(attackers.tolist(), defenders.tolist())
+    combats = []
+    messages = []
+    fought = np.zeros(len(fighters), dtype=bool)
+    
+    for fight_round in range(int(rounds.max()) + 1 if len(rounds) else 0):
+        in_round = rounds == fight_round
+        round_attackers = attackers[in_round]
+        round_defenders = defenders[in_round]
+        
+        unavailable = fighters.is_in_hospital | fighters.is_in_jail
+        ready = ~unavailable[round_attackers] & ~unavailable[round_defenders]
+        skipped += int((~ready).sum())
+        round_attackers = round_attackers[ready]
+        round_defenders = round_defenders[ready]
+        if not len(round_attackers):
+            continue
+        
+        result = fighters.fight(round_attackers, round_defenders, rng, now64)
+        fought[round_attackers] = fought[round_defenders] = True
+        
+        for i, (attacker, defender) in enumerate(zip(round_attackers.tolist(), round_defenders.tolist())):
+            won = result['won'][i]
+            combats.append(Combat(
+                attacker_id=int(fighters.ids[attacker]),
+                defender_id=int(fighters.ids[defender]),
+                winner_id=int(fighters.ids[attacker if won else defender]),
+                location=location,
+                cash_stolen=int(result['cash_stolen'][i]),
+                experience_gained=int(result['experience'][i]) if won else 0,
+                started_at=now,
+                ended_at=now,
+            ))
+            if logs:
+                messages.append(_log_messages(fighters.nicknames[attacker], fighters.nicknames[defender], result, i))
+    
+    players = fighters.players(np.flatnonzero(fought))
+    _write_players(players)
+    Combat.objects.bulk_create(combats, batch_size=500)
+    if logs:
+        CombatLog.objects.bulk_create([
+            CombatLog(combat=combat, message=message, timestamp=now)
+            for combat, combat_messages in zip(combats, messages)
+            for message in combat_messages
+        ], batch_size=500)
+    
+    # The bulk writes skip TrackedModel.save, so push the changes here
+    page_cache_service.players_state_changed(player.id for player in players)
+    opponent_index_service.players_changed(players)
+    for player in players:
+        status_changed(player, WRITTEN_FIELDS)
+    
+    return combats, skipped
@@ -1,44 +1,44 @@
 from django.utils import timezone
+from django.db import OperationalError, connection
+from django.db.models import F
 import random
+import time
 from game.models import Combat, CombatLog
+from game.models.unit_of_work import unit_of_work
+from game.services import opponent_index_service
 from game.services.energy_service import use_energy
 
+# Extra attempts for a fight that hits a lock conflict, and the base delay
+# (in seconds) of the randomized exponential backoff between them
+COMBAT_RETRIES = 3
+COMBAT_RETRY_DELAY = 0.05
+
 def get_available_opponents(player, location, limit=10):
     """
     Get available opponents for the player at the current location
     
+    Opponents are picked at random from the players at the location who are
+    not in hospital/jail and within ±3 levels of the player, using the
+    in-memory opponent index.
+    
     Args:
         player: Player model instance
         location: Location model instance
         limit: Maximum number of opponents to return
     
     Returns:
-        queryset: QuerySet of Player objects
+        list: Player objects in random order
     """
-    from game.models import Player
-    
-    # Get players at the same location who are not in hospital/jail
-    opponents = Player.objects.filter(
-        current_location=location,
-        is_in_hospital=False,
-        is_in_jail=False,
-    ).exclude(
-        id=player.id
-    )
-    
-    # Filter by level range (within ±3 of player's level)
-    min_level = max(1, player.level - 3)
-    max_level = player.level + 3
-    
-    opponents = opponents.filter(level__gte=min_level, level__lte=max_level)
-    
-    # Return a limited number of opponents
-    return opponents[:limit]
+    return opponent_index_service.get_opponents(player, location, limit)
 
 def initiate_combat(attacker, defender, location):
     """
     Start a combat encounter between two players
     
+    Combat runs in its own transaction with both players locked. If it fails
+    on a lock conflict (deadlock, serialization failure or a locked SQLite
+    database) it is retried up to COMBAT_RETRIES times.
+    
     Args:
         attacker: Attacking Player model instance
         defender: Defending Player model instance
@@ -47,24 +47,79 @@ def initiate_combat(attacker, defender, location):
     Returns:
         tuple: (Combat, log_messages, result_message)
     """
-    # Check if attacker has enough energy
-    energy_success, energy_message = use_energy(attacker, 5)
-    if not energy_success:
-        return None, [], energy_message
+    for attempt in range(COMBAT_RETRIES + 1):
+        try:
+            result, locked = _resolve_combat(attacker, defender, location)
+        except OperationalError:
+            # Retrying inside an outer transaction would repeat only part of it
+            if attempt == COMBAT_RETRIES or connection.in_atomic_block:
+                raise
+            time.sleep(random.uniform(0, COMBAT_RETRY_DELAY * 2 ** attempt))
+            continue
         
+        # The fight used rows reloaded under the lock; callers (and the
+        # request's identity map) keep their own instances, so update them
+        attacker.copy_state(locked[attacker.id])
+        defender.copy_state(locked[defender.id])
+        return result
+
+def lock_players(*players):
+    """
+    Lock player rows for the rest of the transaction, in ID order so that
+    concurrent fights between the same players cannot deadlock
+    
+    Args:
+        *players: Player model instances or IDs
+    
+    Returns:
+        dict: Freshly loaded Player objects keyed by ID
+    """
+    return {player.id: player for player in locked_players(players)}
+
+def locked_players(players):
+    """
+    Lock player rows for the rest of the transaction (see lock_players)
+    
+    Args:
+        players: Iterable of Player model instances or IDs
+    
+    Returns:
+        queryset: The locked players, in ID order
+    """
+    from game.models import Player
+    
+    player_ids = sorted({getattr(player, 'id', player) for player in players})
+    
+    if connection.features.has_select_for_update:
+        return Player.objects.select_for_update().filter(id__in=player_ids).order_by('id')
+    
+    # No row locks (SQLite): take the database write lock with a no-op
+    # UPDATE first, so the transaction waits for it instead of failing
+    # when it tries to write after reading
+    Player.objects.filter(id__in=player_ids).update(id=F('id'))
+    return Player.objects.filter(id__in=player_ids).order_by('id')
+
+@unit_of_work()
+def _resolve_combat(attacker, defender, location):
+    locked = lock_players(attacker, defender)
+    attacker = locked[attacker.id]
+    defender = locked[defender.id]
+    
     # Check if either player is in hospital or jail
     if attacker.is_in_hospital or attacker.is_in_jail:
-        return None, [], "You cannot attack while in hospital or jail"
+        return (None, [], "You cannot attack while in hospital or jail"), locked
         
     if defender.is_in_hospital or defender.is_in_jail:
-        return None, [], "You cannot attack a player who is in hospital or jail"
+        return (None, [], "You cannot attack a player who is in hospital or jail"), locked
         
     # Check if in a safe zone
     if location.is_safe_zone:
-        # Refund energy
-        attacker.energy += 5
-        attacker.save(update_fields=['energy'])
-        return None, [], "You cannot attack in a safe zone"
+        return (None, [], "You cannot attack in a safe zone"), locked
+    
+    # Check if attacker has enough energy
+    energy_success, energy_message = use_energy(attacker, 5)
+    if not energy_success:
+        return (None, [], energy_message), locked
     
     # Create new combat record
     combat = Combat.objects.create(
@@ -77,8 +132,9 @@ def initiate_combat(attacker, defender, location):
     # Process the combat
     log_messages, result_message = process_combat(combat)
     
-    return combat, log_messages, result_message
+    return (combat, log_messages, result_message), locked
 
+@unit_of_work()
 def process_combat(combat):
     """
     Process the outcome of a combat
@@ -92,6 +148,10 @@ def process_combat(combat):
     attacker = combat.attacker
     defender = combat.defender
     
+    # Bring regenerated health up to date before applying damage
+    attacker.sync_resources()
+    defender.sync_resources()
+    
     # Combat log to track actions
     combat_log = []
     combat_log.append(f"{attacker.nickname} attacks {defender.nickname}!")
@@ -100,15 +160,10 @@ def process_combat(combat):
     attack_value = attacker.strength * 2 + attacker.dexterity + attacker.speed
     defense_value = defender.defense * 2 + defender.dexterity + defender.speed
     
-    # Add equipment bonuses from items
-    attack_items = attacker.inventory.filter(is_equipped=True)
-    for item in attack_items:
-        attack_value += item.item.attack_power
-        
-    defense_items = defender.inventory.filter(is_equipped=True)
-    for item in defense_items:
-        defense_value += item.item.defense_power
-        
+    # Add equipment bonuses (totals kept on the player)
+    attack_value += attacker.equipped_attack
+    defense_value += defender.equipped_defense
+    
     # Add randomness
     attack_roll = random.randint(1, 20)
     defense_roll = random.randint(1, 20)
@@ -128,12 +183,11 @@ def process_combat(combat):
         damage = max(5, damage)
         
         # Apply damage to defender
-        defender.health -= damage
+        defender.take_damage(damage)
         combat_log.append(f"{attacker.nickname} hits for {damage} damage!")
         
-        # If defender health drops to zero or below, send them to hospital
+        # If defender health drops to zero, send them to hospital
         if defender.health <= 0:
-            defender.health = 0
             defender.is_in_hospital = True
             defender.hospital_release_time = timezone.now() + timezone.timedelta(minutes=30)
             combat_log.append(f"{defender.nickname} has been hospitalized!")
@@ -159,12 +213,11 @@ def process_combat(combat):
         damage = max(3, damage)  # Ensure minimum counter-damage
         
         # Apply counter-damage to attacker
-        attacker.health -= damage
+        attacker.take_damage(damage)
         combat_log.append(f"{defender.nickname} counters for {damage} damage!")
         
-        # If attacker health drops to zero or below, send them to hospital
+        # If attacker health drops to zero, send them to hospital
         if attacker.health <= 0:
-            attacker.health = 0
             attacker.is_in_hospital = True
             attacker.hospital_release_time = timezone.now() + timezone.timedelta(minutes=20)
             combat_log.append(f"{attacker.nickname} has been hospitalized!")
@@ -183,12 +236,7 @@ def process_combat(combat):
     defender.save()
     
     # Create combat log entries
-    for entry in combat_log:
-        CombatLog.objects.create(
-            combat=combat,
-            message=entry,
-            timestamp=timezone.now()
-        )
+    CombatLog.record(combat, combat_log)
     
     return combat_log, result_message
 
@@ -205,6 +253,8 @@ def get_recent_combat_logs(player, limit=5):
     """
     combat_logs = Combat.objects.filter(
         attacker=player
-    ).order_by('-started_at')[:limit]
+    ).select_related(
+        'attacker', 'defender', 'winner'
+    ).prefetch_related('logs').order_by('-started_at')[:limit]
     
     return combat_logs
@@ -5,12 +5,14 @@ import random
 import math
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import F, Q, Sum
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.db.models import F, Q
 
-from ..models.crime import CrimeType, CrimeResult
+from ..models.crime import CrimeType, CrimeResult, CrimeStats
 from ..models.item import Item, PlayerInventory
+from ..models.unit_of_work import unit_of_work
+from .notification_service import notify
+from .page_cache_service import player_state_changed
+from .reference_data_service import get_reference_data
 
 def get_available_crimes(player):
     """
@@ -20,9 +22,9 @@ def get_available_crimes(player):
         player: Player object
         
     Returns:
-        Queryset of CrimeType objects
+        List of CrimeType objects ordered by minimum level
     """
-    return CrimeType.objects.filter(min_level__lte=player.level).order_by('min_level')
+    return get_reference_data().available_crimes(player.level)
 
 def calculate_success_chance(player, crime_type):
     """
@@ -53,6 +55,7 @@ def calculate_success_chance(player, crime_type):
     # Clamp between 10% and 95%
     return max(0.10, min(0.95, chance))
 
+@unit_of_work()
 def commit_crime(player, crime_type_id, location):
     """
     Have a player attempt to commit a crime.
@@ -69,7 +72,7 @@ def commit_crime(player, crime_type_id, location):
         ValueError: If validation fails
     """
     try:
-        crime_type = CrimeType.objects.get(id=crime_type_id)
+        crime_type = get_reference_data().get(CrimeType, crime_type_id)
     except CrimeType.DoesNotExist:
         raise ValueError("Invalid crime type.")
     
@@ -77,13 +80,11 @@ def commit_crime(player, crime_type_id, location):
     if player.level < crime_type.min_level:
         raise ValueError(f"You need to be level {crime_type.min_level} to commit this crime.")
     
-    # Check if player has enough energy
-    if player.energy < crime_type.energy_cost:
+    # Check if player has enough energy and deduct it first
+    if not player.spend_energy(crime_type.energy_cost):
         raise ValueError(f"Not enough energy. You need {crime_type.energy_cost} but have {player.energy}.")
     
-    # Deduct energy first
-    player.energy -= crime_type.energy_cost
-    player.save(update_fields=['energy'])
+    player.save(update_fields=['energy', 'last_energy_refill'])
     
     # Calculate success chance
     success_chance = calculate_success_chance(player, crime_type)
@@ -152,6 +153,10 @@ def commit_crime(player, crime_type_id, location):
     
     # Save the result
     result.save()
+    CrimeStats.record(result)
+    
+    # The crimes page shows recent results and the crime record
+    player_state_changed(player.id)
     
     return result
 
@@ -221,11 +226,12 @@ def get_recent_crimes(player, limit=10):
     Returns:
         Queryset of CrimeResult objects
     """
-    return CrimeResult.objects.filter(player=player).order_by('-created_at')[:limit]
+    return CrimeResult.objects.filter(player=player).select_related('crime_type').order_by('-created_at')[:limit]
 
 def notify_player(player, title, message, level="info"):
     """
-    Send a notification to the player through WebSocket.
+    Send a notification to the player through WebSocket (after the
+    current transaction commits, without waiting for delivery).
     
     Args:
         player: Player object
@@ -233,57 +239,53 @@ def notify_player(player, title, message, level="info"):
         message: Notification message
         level: Notification level (info, success, warning, danger)
     """
-    channel_layer = get_channel_layer()
-    try:
-        async_to_sync(channel_layer.group_send)(
-            f'player_{player.id}',
-            {
-                'type': 'game_notification',
-                'message': message,
-                'title': title,
-                'level': level
-            }
-        )
-    except Exception as e:
-        print(f"Failed to send notification: {e}")
+    notify(f'player_{player.id}', {
+        'type': 'game_notification',
+        'message': message,
+        'title': title,
+        'level': level
+    })
+
+def get_crime_type_stats(player):
+    """
+    Get a player's running totals per crime type.
+    
+    Args:
+        player: Player object
+    
+    Returns:
+        List of CrimeStats objects (with their crime type)
+    """
+    return list(
+        CrimeStats.objects.filter(player=player).select_related('crime_type').order_by('crime_type_id')
+    )
 
-def get_crime_stats(player):
+def get_crime_stats(player, type_stats=None):
     """
     Get crime statistics for a player.
     
     Args:
         player: Player object
+        type_stats: Optional result of get_crime_type_stats to summarize
+            (saves reading it again)
         
     Returns:
         Dictionary with crime statistics
     """
-    total_crimes = CrimeResult.objects.filter(player=player).count()
-    successful_crimes = CrimeResult.objects.filter(player=player, result='success').count()
-    failed_crimes = CrimeResult.objects.filter(player=player, result='failed').count()
-    jailed_count = CrimeResult.objects.filter(player=player, result='jailed').count()
+    if type_stats is None:
+        type_stats = get_crime_type_stats(player)
     
-    success_rate = (successful_crimes / total_crimes * 100) if total_crimes > 0 else 0
-    
-    total_earnings = CrimeResult.objects.filter(
-        player=player, 
-        result='success'
-    ).values('cash_reward').aggregate(
-        total=Sum('cash_reward')
-    )['total'] or 0
+    total_crimes = sum(stats.attempts for stats in type_stats)
+    successful_crimes = sum(stats.successes for stats in type_stats)
     
-    total_exp = CrimeResult.objects.filter(
-        player=player, 
-        result='success'
-    ).values('exp_reward').aggregate(
-        total=Sum('exp_reward')
-    )['total'] or 0
+    success_rate = (successful_crimes / total_crimes * 100) if total_crimes > 0 else 0
     
     return {
         'total_crimes': total_crimes,
         'successful_crimes': successful_crimes,
-        'failed_crimes': failed_crimes,
-        'jailed_count': jailed_count,
+        'failed_crimes': sum(stats.failures for stats in type_stats),
+        'jailed_count': sum(stats.jailings for stats in type_stats),
         'success_rate': round(success_rate, 1),
-        'total_earnings': total_earnings,
-        'total_exp': total_exp
-    } 
\ No newline at end of file
+        'total_earnings': sum(stats.cash_earned for stats in type_stats),
+        'total_exp': sum(stats.exp_earned for stats in type_stats)
+    }
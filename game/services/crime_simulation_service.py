@@ -0,0 +1,226 @@
+"""
+Crime simulation service module for balancing crime types.
+
+Runs the rules of crime_service.calculate_success_chance and commit_crime
+(success roll, jail roll, reward and jail time ranges) as vectorized NumPy
+draws over a population of player stats, so the aggregate effect of a
+CrimeType change can be measured over millions of attempts in seconds.
+"""
+import numpy as np
+
+from ..models.crime import CrimeType
+from ..models.player import Player
+
+STATS = ('strength', 'defense', 'speed', 'dexterity', 'intelligence')
+
+# Attempts simulated per NumPy pass (bounds memory use)
+CHUNK_SIZE = 1_000_000
+
+# Energy regenerated per hour, which limits how often crimes can be committed
+ENERGY_PER_HOUR = 3600 / Player.ENERGY_REGEN_INTERVAL
+
+CRIME_FIELDS = (
+    'id', 'name', 'min_level', 'energy_cost',
+    'min_cash_reward', 'max_cash_reward', 'min_exp_reward', 'max_exp_reward',
+    'jail_risk', 'min_jail_time', 'max_jail_time', 'item_reward_chance',
+    'base_success_chance',
+) + tuple(f'{stat}_factor' for stat in STATS)
+
+class PlayerPopulation:
+    """
+    Stats and levels of a player population as NumPy arrays
+    """
+    def __init__(self, levels, stats):
+        """
+        Args:
+            levels: int array of player levels
+            stats: float array of shape (players, len(STATS))
+        """
+        self.levels = np.asarray(levels, dtype=np.int64)
+        self.stats = np.asarray(stats, dtype=np.float64)
+    
+    def __len__(self):
+        return len(self.levels)
+    
+    @classmethod
+    def synthetic(cls, size, rng, min_level=1, max_level=30, stat_mean=10, stat_growth=2.0, stat_spread=0.25):
+        """
+        Generate players with uniformly spread levels and stats that grow with
+        level (stat_mean + stat_growth per level, with relative noise)
+        """
+        levels = rng.integers(min_level, max_level + 1, size)
+        expected = stat_mean + stat_growth * (levels - 1)
+        noise = rng.normal(1.0, stat_spread, (size, len(STATS)))
+        stats = np.maximum(expected[:, None] * noise, 1).round()
+        return cls(levels, stats)
+    
+    @classmethod
+    def sample(cls, size, rng):
+        """Sample players (with replacement) from the live player table"""
+        rows = np.array(list(Player.objects.values_list('level', *STATS)), dtype=np.float64).reshape(-1, 1 + len(STATS))
+        if not len(rows):
+            raise ValueError("There are no players to sample from.")
+        picked = rows[rng.integers(0, len(rows), size)]
+        return cls(picked[:, 0], picked[:, 1:])
+
+def load_crime_types(ids=None):
+    """
+    Load crime types as dictionaries of the fields the simulation uses
+    Returns: list of dicts ordered by minimum level
+    """
+    crime_types = CrimeType.objects.order_by('min_level', 'id')
+    if ids:
+        crime_types = crime_types.filter(id__in=ids)
+    return list(crime_types.values(*CRIME_FIELDS))
+
+def success_chance(crime_type, levels, stats):
+    """Vectorized crime_service.calculate_success_chance"""
+    factors = np.array([crime_type[f'{stat}_factor'] for stat in STATS])
+    chance = crime_type['base_success_chance'] + (stats / 100) @ factors
+    
+    level_diff = levels - crime_type['min_level']
+    chance = chance + np.where(level_diff > 0, np.minimum(0.2, level_diff * 0.02), 0)
+    
+    return np.clip(chance, 0.10, 0.95)
+
+def roll_attempts(crime_type, levels, stats, rng):
+    """
+    Roll one attempt of a crime for each player, as commit_crime does
+    
+    Returns:
+        tuple: (cash, exp, jail_time, jailed, succeeded) arrays
+    """
+    size = len(levels)
+    succeeded = rng.random(size) <= success_chance(crime_type, levels, stats)
+    
+    # Failing raises the jail risk by half
+    risk = np.where(succeeded, crime_type['jail_risk'], crime_type['jail_risk'] * 1.5)
+    jailed = rng.random(size) <= risk
+    rewarded = succeeded & ~jailed
+    
+    cash = np.where(rewarded, rng.integers(crime_type['min_cash_reward'], crime_type['max_cash_reward'] + 1, size), 0)
+    exp = np.where(rewarded, rng.integers(crime_type['min_exp_reward'], crime_type['max_exp_reward'] + 1, size), 0)
+    jail_time = np.where(jailed, rng.integers(crime_type['min_jail_time'], crime_type['max_jail_time'] + 1, size), 0)
+    
+    return cash, exp, jail_time, jailed, succeeded
+
+def simulate_crime_type(crime_type, population, attempts, rng):
+    """
+    Simulate attempts of one crime by random eligible players.
+    
+    Args:
+        crime_type: Dictionary from load_crime_types
+        population: PlayerPopulation
+        attempts: Number of attempts to simulate
+        rng: numpy.random.Generator
+    
+    Returns:
+        Dictionary of per-attempt, per-energy and per-hour outcomes, or None
+        if no player in the population can commit the crime
+    """
+    eligible = np.flatnonzero(population.levels >= crime_type['min_level'])
+    if not len(eligible):
+        return None
+    
+    totals = {'succeeded': 0, 'jailed': 0, 'cash': 0, 'exp': 0, 'jail_time': 0}
+    remaining = attempts
+    while remaining > 0:
+        size = min(remaining, CHUNK_SIZE)
+        players = eligible[rng.integers(0, len(eligible), size)]
+        cash, exp, jail_time, jailed, succeeded = roll_attempts(
+            crime_type, population.levels[players], population.stats[players], rng
+        )
+        
+        totals['succeeded'] += int(succeeded.sum())
+        totals['jailed'] += int(jailed.sum())
+        totals['cash'] += int(cash.sum())
+        totals['exp'] += int(exp.sum())
+        totals['jail_time'] += int(jail_time.sum())
+        remaining -= size
+    
+    energy = max(crime_type['energy_cost'], 1)
+    cash_per_attempt = totals['cash'] / attempts
+    exp_per_attempt = totals['exp'] / attempts
+    jail_per_attempt = totals['jail_time'] / attempts
+    
+    # Playing flat out: attempts are limited by energy regeneration, and
+    # time in jail comes out of the hour
+    regen_seconds = energy / ENERGY_PER_HOUR * 3600
+    attempts_per_hour = 3600 / (regen_seconds + jail_per_attempt)
+    
+    return {
+        'id': crime_type['id'],
+        'name': crime_type['name'],
+        'attempts': attempts,
+        'eligible_players': len(eligible),
+        'success_rate': totals['succeeded'] / attempts,
+        'jail_rate': totals['jailed'] / attempts,
+        'cash_per_attempt': cash_per_attempt,
+        'exp_per_attempt': exp_per_attempt,
+        'cash_per_energy': cash_per_attempt / energy,
+        'exp_per_energy': exp_per_attempt / energy,
+        'jail_seconds_per_attempt': jail_per_attempt,
+        'cash_per_hour': cash_per_attempt * attempts_per_hour,
+        'exp_per_hour': exp_per_attempt * attempts_per_hour,
+        'jail_minutes_per_hour': jail_per_attempt * attempts_per_hour / 60,
+    }
+
+def simulate_progression(crime_types, population, hours, rng, step_hours=1):
+    """
+    Simulate players levelling up by committing the highest-level crime
+    they can, with energy regeneration and jail time limiting the pace.
+    
+    Experience and level-ups follow Player.gain_experience. Stats stay as
+    they are (no training).
+    
+    Args:
+        crime_types: List of dictionaries from load_crime_types
+        population: PlayerPopulation (levels are the starting levels)
+        hours: Hours of play to simulate
+        rng: numpy.random.Generator
+        step_hours: Hours between points of the curve
+    
+    Returns:
+        List of (hour, mean level, p10 level, p50 level, p90 level) tuples
+    """
+    levels = population.levels.copy()
+    experience = np.zeros(len(population), dtype=np.int64)
+    clock = np.zeros(len(population))
+    min_levels = np.array([crime_type['min_level'] for crime_type in crime_types])
+    
+    def point(hour):
+        p10, p50, p90 = np.percentile(levels, [10, 50, 90])
+        return (hour, float(levels.mean()), float(p10), float(p50), float(p90))
+    
+    curve = [point(0)]
+    for hour in np.arange(step_hours, hours + step_hours, step_hours):
+        while True:
+            active = np.flatnonzero(clock < hour * 3600)
+            if not len(active):
+                break
+            
+            # Highest-level crime each active player can commit
+            choice = np.searchsorted(min_levels, levels[active], side='right') - 1
+            for index in np.unique(choice):
+                if index < 0:
+                    # Nothing to commit yet: these players sit the step out
+                    clock[active[choice == index]] = hour * 3600
+                    continue
+                
+                crime_type = crime_types[index]
+                players = active[choice == index]
+                _, exp, jail_time, _, _ = roll_attempts(
+                    crime_type, levels[players], population.stats[players], rng
+                )
+                clock[players] += max(crime_type['energy_cost'], 1) / ENERGY_PER_HOUR * 3600 + jail_time
+                
+                # Player.gain_experience: at most one level per attempt
+                experience[players] += exp
+                needed = levels[players] * 100
+                level_up = experience[players] >= needed
+                experience[players] -= np.where(level_up, needed, 0)
+                levels[players] += level_up
+        
+        curve.append(point(int(hour)))
+    
+    return curve
@@ -0,0 +1,196 @@
+"""
+Economy service module for batch property income and valuation.
+
+The income columns of many properties are loaded into NumPy arrays with one
+query, and accrued income, the income cap and projected upgrades are then
+computed for all of them at once. The arithmetic mirrors Property
+(collect_income and upgrade) exactly, so the numbers shown match what
+collecting or upgrading would give.
+"""
+import numpy as np
+from django.utils import timezone
+
+from ..models.functions import ElapsedSeconds
+from ..models.property import Property
+
+SECONDS_PER_DAY = 86400
+
+class PropertyBook:
+    """
+    Columns of a set of properties as NumPy arrays
+    """
+    def __init__(self, ids, player_ids, income_rate, current_value, level, elapsed):
+        self.ids = ids
+        self.player_ids = player_ids
+        self.income_rate = income_rate
+        self.current_value = current_value
+        self.level = level
+        self.elapsed = elapsed
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @classmethod
+    def load(cls, queryset=None, now=None):
+        """
+        Load the active properties of a queryset (all by default).
+        
+        Args:
+            queryset: Optional Property queryset to narrow the selection
+            now: Optional timezone-aware datetime (defaults to now)
+        
+        Returns:
+            PropertyBook
+        """
+        if now is None:
+            now = timezone.now()
+        if queryset is None:
+            queryset = Property.objects.all()
+        
+        # Elapsed time is computed by the database, so rows arrive as plain integers
+        rows = queryset.filter(is_active=True).annotate(
+            elapsed=ElapsedSeconds('last_income_collection', now)
+        ).order_by('id').values_list('id', 'player_id', 'income_rate', 'current_value', 'level', 'elapsed')
+        
+        columns = np.array(list(rows), dtype=np.int64).reshape(-1, 6)
+        return cls(*columns.T)
+    
+    def accrued_income(self, after_seconds=0):
+        """
+        Income each property will have accrued `after_seconds` from now
+        if it is not collected, capped at Property.INCOME_CAP_DAYS
+        Returns: int64 array
+        """
+        cap = Property.INCOME_CAP_DAYS * SECONDS_PER_DAY
+        seconds = np.clip(self.elapsed + after_seconds, None, cap)
+        return np.maximum(self.income_rate * seconds // SECONDS_PER_DAY, 0)
+    
+    def seconds_until_cap(self):
+        """Seconds until each property stops accruing (0 once capped)"""
+        cap = Property.INCOME_CAP_DAYS * SECONDS_PER_DAY
+        return np.clip(cap - self.elapsed, 0, cap)
+    
+    def project_upgrades(self, upgrades):
+        """
+        Project income rate, value and total cost after `upgrades` upgrades,
+        truncating after every level as Property.upgrade does
+        
+        Returns:
+            tuple: (income_rate, current_value, total_cost) int64 arrays
+        """
+        income_rate = self.income_rate
+        current_value = self.current_value
+        total_cost = np.zeros(len(self), dtype=np.int64)
+        
+        for _ in range(upgrades):
+            total_cost = total_cost + (current_value * Property.UPGRADE_COST_FACTOR).astype(np.int64)
+            income_rate = (income_rate * Property.UPGRADE_INCOME_FACTOR).astype(np.int64)
+            current_value = (current_value * Property.UPGRADE_VALUE_FACTOR).astype(np.int64)
+        
+        return income_rate, current_value, total_cost
+    
+    def per_player(self, values):
+        """
+        Sum a per-property array for each player
+        Returns: dict of player ID -> total
+        """
+        player_ids, index = np.unique(self.player_ids, return_inverse=True)
+        totals = np.bincount(index, weights=values, minlength=len(player_ids))
+        return dict(zip(player_ids.tolist(), totals.astype(np.int64).tolist()))
+
+def get_income_forecast(player, upgrades=3, now=None):
+    """
+    Forecast a player's property income and upgrade outcomes.
+    
+    Args:
+        player: Player whose properties to forecast
+        upgrades: Number of upgrade levels to project
+        now: Optional timezone-aware datetime (defaults to now)
+    
+    Returns:
+        Dictionary with a 'properties' list (one dict per property, by ID)
+        and the player's 'totals'
+    """
+    book = PropertyBook.load(Property.objects.filter(player=player), now)
+    
+    accrued = book.accrued_income()
+    tomorrow = book.accrued_income(SECONDS_PER_DAY)
+    until_cap = book.seconds_until_cap()
+    projections = [book.project_upgrades(level) for level in range(1, upgrades + 1)]
+    
+    properties = []
+    for i, property_id in enumerate(book.ids.tolist()):
+        properties.append({
+            'id': property_id,
+            'level': int(book.level[i]),
+            'income_rate': int(book.income_rate[i]),
+            'current_value': int(book.current_value[i]),
+            'accrued': int(accrued[i]),
+            'accrued_tomorrow': int(tomorrow[i]),
+            'hours_until_cap': round(int(until_cap[i]) / 3600, 1),
+            'upgrades': [
+                {
+                    'level': int(book.level[i]) + level,
+                    'income_rate': int(income_rate[i]),
+                    'current_value': int(current_value[i]),
+                    'cost': int(cost[i]),
+                }
+                for level, (income_rate, current_value, cost) in enumerate(projections, start=1)
+            ],
+        })
+    
+    return {
+        'properties': properties,
+        'totals': {
+            'properties': len(book),
+            'daily_income': int(book.income_rate.sum()),
+            'accrued': int(accrued.sum()),
+            'accrued_tomorrow': int(tomorrow.sum()),
+            'capped': int((until_cap == 0).sum()),
+            'current_value': int(book.current_value.sum()),
+        },
+    }
+
+def get_economy_report(now=None):
+    """
+    Summarize the property economy across all players.
+    
+    Args:
+        now: Optional timezone-aware datetime (defaults to now)
+    
+    Returns:
+        Dictionary of totals and distributions
+    """
+    book = PropertyBook.load(now=now)
+    if not len(book):
+        return {'properties': 0, 'owners': 0}
+    
+    accrued = book.accrued_income()
+    capped = book.seconds_until_cap() == 0
+    income_rate, current_value, cost = book.project_upgrades(1)
+    
+    daily_by_player = np.array(list(book.per_player(book.income_rate).values()), dtype=np.int64)
+    p50, p90, p99 = np.percentile(daily_by_player, [50, 90, 99])
+    
+    return {
+        'properties': len(book),
+        'owners': len(daily_by_player),
+        'daily_income': int(book.income_rate.sum()),
+        'uncollected_income': int(accrued.sum()),
+        # Properties past the cap earn nothing until they are collected
+        'capped_properties': int(capped.sum()),
+        'capped_daily_income': int(book.income_rate[capped].sum()),
+        'total_value': int(book.current_value.sum()),
+        'mean_level': round(float(book.level.mean()), 2),
+        'next_upgrade': {
+            'cost': int(cost.sum()),
+            'daily_income_gain': int((income_rate - book.income_rate).sum()),
+            'value_gain': int((current_value - book.current_value).sum()),
+        },
+        'daily_income_per_owner': {
+            'p50': int(p50),
+            'p90': int(p90),
+            'p99': int(p99),
+            'max': int(daily_by_player.max()),
+        },
+    }
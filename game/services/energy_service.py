@@ -1,6 +1,8 @@
 from django.utils import timezone
 from django.db.models import F
 
+from game.services import ledger_service
+
 def calculate_energy_regeneration(player, current_time=None):
     """
     Calculate how much energy should be regenerated based on time passed
@@ -15,15 +17,16 @@ def calculate_energy_regeneration(player, current_time=None):
     if current_time is None:
         current_time = timezone.now()
         
-    time_diff = current_time - player.last_energy_refill
-    
-    # Energy regenerates at 1 point per 5 minutes
-    energy_to_add = min(
-        player.max_energy - player.energy,
-        time_diff.total_seconds() // 300  # 300 seconds = 5 minutes
+    # Energy regenerates at 1 point per 5 minutes, capped at max_energy
+    energy, _ = player._regenerated(
+        player.energy,
+        player.max_energy,
+        player.last_energy_refill,
+        player.ENERGY_REGEN_INTERVAL,
+        current_time
     )
     
-    return int(energy_to_add)
+    return max(0, energy - player.energy)
 
 def regenerate_player_energy(player):
     """
@@ -35,22 +38,15 @@ def regenerate_player_energy(player):
     Returns:
         bool: True if energy was regenerated, False otherwise
     """
-    current_time = timezone.now()
-    energy_to_add = calculate_energy_regeneration(player, current_time)
+    changed = [
+        field for field in player.sync_resources()
+        if field in ('energy', 'last_energy_refill')
+    ]
     
-    if energy_to_add <= 0:
+    if not changed:
         return False
         
-    # Update player's energy
-    player.energy += energy_to_add
-    
-    # Update the last refill time, but keep partial progress toward next point
-    seconds_used = energy_to_add * 300  # 300 seconds = 5 minutes
-    player.last_energy_refill = current_time - timezone.timedelta(
-        seconds=(current_time - player.last_energy_refill).total_seconds() % 300
-    )
-    
-    player.save(update_fields=['energy', 'last_energy_refill'])
+    player.save(update_fields=changed)
     return True
 
 def use_energy(player, amount):
@@ -64,13 +60,9 @@ def use_energy(player, amount):
     Returns:
         tuple: (success, message)
     """
-    # Make sure player has enough energy
-    if player.energy < amount:
+    # Check and deduct energy (including regeneration) in one statement
+    if not ledger_service.spend_energy(player, amount):
         return False, "Not enough energy"
-        
-    # Deduct energy
-    player.energy -= amount
-    player.save(update_fields=['energy'])
     
     return True, f"Used {amount} energy"
 
@@ -85,6 +77,8 @@ def refill_energy(player, amount=None):
     Returns:
         int: Actual amount refilled
     """
+    player.sync_resources()
+    
     if amount is None:
         # Full refill
         amount = player.max_energy - player.energy
@@ -96,6 +90,6 @@ def refill_energy(player, amount=None):
         return 0
         
     player.energy += amount
-    player.save(update_fields=['energy'])
+    player.save(update_fields=['energy', 'last_energy_refill'])
     
     return amount
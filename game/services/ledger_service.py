@@ -0,0 +1,137 @@
+"""
+Ledger service module for spending and crediting player resources.
+
+Each operation is a single conditional UPDATE, so checking and spending a
+resource takes one round trip and cannot lose a concurrent update.
+"""
+from django.utils import timezone
+from django.db import connection
+from django.db.models import Case, F, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+
+from ..models.player import Player
+from ..models.functions import AddSeconds, ElapsedSeconds
+from .page_cache_service import player_state_changed
+from .status_service import send_delta
+
+def _regenerated_energy(now):
+    """
+    Build expressions for a player's energy and refill time after spending
+    at `now`, mirroring Player.spend_energy.
+    
+    Returns:
+        tuple: (current energy expression, new last_energy_refill expression)
+    """
+    points = ElapsedSeconds(F('last_energy_refill'), now) / Player.ENERGY_REGEN_INTERVAL
+    capped = GreaterThanOrEqual(F('energy') + points, F('max_energy'))
+    full = GreaterThanOrEqual(F('energy'), F('max_energy'))
+    
+    energy = Case(
+        When(full, then=F('energy')),
+        When(capped, then=F('max_energy')),
+        default=F('energy') + points
+    )
+    
+    # Regeneration is idle while full, so the clock restarts from now
+    last_refill = Case(
+        When(full, then=Value(now)),
+        When(capped, then=Value(now)),
+        default=AddSeconds(F('last_energy_refill'), points * Player.ENERGY_REGEN_INTERVAL)
+    )
+    
+    return energy, last_refill
+
+def spend_energy(player, amount):
+    """
+    Spend energy (including regeneration) if the player has enough.
+    
+    Args:
+        player: Player object (updated in memory on success)
+        amount: Amount of energy to spend
+    
+    Returns:
+        True if the energy was spent, False otherwise
+    """
+    now = timezone.now()
+    energy, last_refill = _regenerated_energy(now)
+    
+    spent = Player.objects.filter(
+        GreaterThanOrEqual(energy, amount),
+        id=player.id
+    ).update(
+        energy=energy - amount,
+        last_energy_refill=last_refill
+    )
+    
+    if spent:
+        # Mirror the update in memory; reload only if our copy was stale
+        if not player.spend_energy(amount, now):
+            player.refresh_from_db(fields=['energy', 'last_energy_refill'])
+        player.mark_clean('energy', 'last_energy_refill')
+    
+    return bool(spent)
+
+def spend_cash(player, amount):
+    """
+    Spend cash if the player has enough.
+    
+    Args:
+        player: Player object (updated in memory on success)
+        amount: Amount of cash to spend
+    
+    Returns:
+        True if the cash was spent, False otherwise
+    """
+    spent = Player.objects.filter(id=player.id, cash__gte=amount).update(
+        cash=F('cash') - amount
+    )
+    
+    if spent:
+        player.cash -= amount
+        player.mark_clean('cash')
+    
+    return bool(spent)
+
+def _add_cash_returning(player_id, amount):
+    """
+    Add cash to a player by ID and read the new balance in the same statement
+    (UPDATE ... RETURNING on PostgreSQL and SQLite 3.35+)
+    
+    Returns:
+        New cash balance, or None if there is no such player
+    """
+    rows = Player.objects.filter(id=player_id)
+    if not connection.features.can_return_columns_from_insert:
+        rows.update(cash=F('cash') + amount)
+        return rows.values_list('cash', flat=True).first()
+    
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(Player._meta.db_table)} SET {quote('cash')} = {quote('cash')} + %s "
+            f"WHERE {quote('id')} = %s RETURNING {quote('cash')}",
+            [amount, player_id]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+def credit_cash(player, amount):
+    """
+    Add cash to a player.
+    
+    Args:
+        player: Player object (updated in memory) or player ID
+        amount: Amount of cash to add
+    """
+    if not isinstance(player, Player):
+        # The row is ours until commit, so this is the committed balance
+        cash = _add_cash_returning(player, amount)
+        if cash is not None:
+            send_delta(player, {'cash': cash})
+        player_state_changed(player)
+        return
+    
+    Player.objects.filter(id=player.id).update(cash=F('cash') + amount)
+    
+    player.cash += amount
+    player.mark_clean('cash')
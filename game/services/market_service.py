@@ -1,16 +1,20 @@
 """
 Market service module for handling marketplace functionalities.
 """
+from collections import defaultdict
 from datetime import timedelta
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
 from ..models.market import MarketListing
 from ..models.item import Item, PlayerInventory
+from . import order_book_service
+from .reference_data_service import get_reference_data
 
 def get_active_listings(player=None, item_type=None, min_level=None, max_price=None, limit=20):
     """
-    Get active market listings with optional filtering.
+    Get the cheapest active market listings with optional filtering.
     
     Args:
         player: Optional player to exclude their own listings
@@ -20,30 +24,15 @@ def get_active_listings(player=None, item_type=None, min_level=None, max_price=N
         limit: Maximum number of listings to return
         
     Returns:
-        Queryset of MarketListing objects
+        List of MarketListing objects, cheapest first
     """
-    listings = MarketListing.objects.filter(
-        status='active',
-        expires_at__gt=timezone.now()
+    return order_book_service.get_best_listings(
+        item_type_id=item_type.id if item_type else None,
+        min_level=min_level,
+        max_price=max_price,
+        exclude_seller_id=player.id if player else None,
+        limit=limit
     )
-    
-    # Filter by item type if provided
-    if item_type:
-        listings = listings.filter(item__item_type=item_type)
-    
-    # Filter by player level requirements
-    if min_level is not None:
-        listings = listings.filter(item__min_level__lte=min_level)
-    
-    # Filter by maximum price
-    if max_price is not None:
-        listings = listings.filter(price__lte=max_price)
-    
-    # Exclude player's own listings
-    if player:
-        listings = listings.exclude(seller=player)
-    
-    return listings.order_by('price')[:limit]
 
 def get_player_listings(player, include_sold=False, limit=20):
     """
@@ -83,7 +72,7 @@ def create_listing(player, item_id, quantity, price, duration_days=3):
     """
     # Check if player has enough of the item
     try:
-        item = Item.objects.get(id=item_id)
+        item = get_reference_data().get(Item, item_id)
         inventory = PlayerInventory.objects.get(player=player, item=item)
     except (Item.DoesNotExist, PlayerInventory.DoesNotExist):
         raise ValueError("You don't have this item in your inventory.")
@@ -107,6 +96,7 @@ def create_listing(player, item_id, quantity, price, duration_days=3):
         price=price,
         expires_at=expires_at
     )
+    order_book_service.listing_added(listing)
     
     # Remove item from player's inventory
     if inventory.quantity == quantity:
@@ -157,16 +147,16 @@ def purchase_listing(listing_id, player):
     except MarketListing.DoesNotExist:
         raise ValueError("Listing not found or no longer available.")
     
-    # Check if player has enough money
-    if player.cash < listing.price:
-        raise ValueError(f"Not enough cash. You need {listing.price} but have {player.cash}.")
-    
     # Check if player is trying to buy their own listing
-    if listing.seller == player:
+    if listing.seller_id == player.id:
         raise ValueError("You cannot buy your own listing.")
     
-    # Process the purchase
-    return listing.purchase(player)
+    # Process the purchase (cash is checked and spent in one statement)
+    success, message = listing.purchase(player)
+    if not success:
+        raise ValueError(message)
+    
+    return listing
 
 def get_expired_listings():
     """
@@ -180,21 +170,58 @@ def get_expired_listings():
         expires_at__lte=timezone.now()
     )
 
-def process_expired_listings():
+def expire_listings(now=None, chunk_size=1000):
     """
-    Process all expired listings by canceling them.
+    Expire every active listing past its expiry time and return the items
+    to the sellers' inventories.
+    
+    Listings are expired in chunks, each in its own transaction: the chunk's
+    rows are locked with SKIP LOCKED (so several workers can share a backlog
+    without waiting on each other), flipped to expired with one UPDATE, and
+    their quantities returned with one upsert grouped by (seller, item).
     
+    Args:
+        now: Optional timezone-aware datetime (defaults to now)
+        chunk_size: Maximum number of listings expired per transaction
+        
     Returns:
-        Number of processed listings
+        Number of expired listings
     """
-    expired_listings = get_expired_listings()
-    count = 0
+    if now is None:
+        now = timezone.now()
     
-    for listing in expired_listings:
-        try:
-            listing.check_expiry()
-            count += 1
-        except Exception:
-            continue
+    count = 0
+    while True:
+        with transaction.atomic():
+            rows = list(MarketListing.objects.select_for_update(skip_locked=True).filter(
+                status='active',
+                expires_at__lte=now
+            ).order_by('expires_at').values_list('id', 'seller_id', 'item_id', 'quantity')[:chunk_size])
+            
+            if not rows:
+                break
+            
+            listing_ids = [row[0] for row in rows]
+            MarketListing.objects.filter(id__in=listing_ids).update(status='expired')
+            
+            quantities = defaultdict(int)
+            for _, seller_id, item_id, quantity in rows:
+                quantities[(seller_id, item_id)] += quantity
+            PlayerInventory.add_quantities(quantities)
+            
+            order_book_service.listing_removed(*listing_ids)
+        
+        count += len(rows)
+        if len(rows) < chunk_size:
+            break
     
     return count
+
+def process_expired_listings():
+    """
+    Process all expired listings by returning their items to the sellers.
+    
+    Returns:
+        Number of processed listings
+    """
+    return expire_listings()
@@ -0,0 +1,186 @@
+"""
+Notification service module for sending WebSocket messages off the request path.
+
+Game actions enqueue messages for channel layer groups; they are queued
+when the action's transaction commits, so nothing is sent for rolled back
+actions. A background dispatcher thread drains the queue in batches,
+retries failed sends with exponential backoff and drops messages that keep
+failing. The queue is bounded: when the channel layer cannot keep up (or
+is down) new messages are dropped instead of piling up in memory or
+blocking requests.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from django.db import transaction
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+class NotificationOutbox:
+    """
+    Bounded queue of (group, message) pairs sent to the channel layer by a
+    background thread
+    
+    Messages are sent on the event loop the WebSocket consumers of this
+    process run on (see bind_event_loop), which InMemoryChannelLayer needs
+    to deliver them, or on the dispatcher's own loop when there is none.
+    """
+    def __init__(self, max_size=10000, batch_size=100, max_attempts=5, retry_delay=0.5, send_timeout=10):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.send_timeout = send_timeout
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._thread = None
+        self._consumer_loop = None
+        self._own_loop = None
+    
+    def __len__(self):
+        return len(self._queue)
+    
+    def bind_event_loop(self, loop):
+        """Send on `loop` (the loop WebSocket consumers run on) from now on"""
+        self._consumer_loop = loop
+    
+    def enqueue(self, group, message):
+        """
+        Queue a message for a group
+        Returns: True if queued, False if dropped because the queue is full
+        """
+        with self._condition:
+            if len(self._queue) >= self.max_size:
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logger.warning("Notification outbox full, %s messages dropped so far", self.dropped)
+                return False
+            
+            self._queue.append((0, group, message))
+            self._condition.notify()
+        
+        self._ensure_dispatcher()
+        return True
+    
+    def _ensure_dispatcher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-outbox', daemon=True)
+                self._thread.start()
+    
+    def _take_batch(self, timeout=None):
+        with self._condition:
+            if not self._queue:
+                self._condition.wait(timeout)
+            
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            return batch
+    
+    def _run(self):
+        while True:
+            batch = self._take_batch(timeout=1)
+            if batch:
+                retry = self.send_batch(batch)
+                if retry:
+                    # Back off before the next attempt of this batch
+                    attempts = retry[0][0]
+                    time.sleep(self.retry_delay * 2 ** (attempts - 1))
+    
+    def send_batch(self, batch):
+        """
+        Send a batch of queued (attempts, group, message) entries
+        Returns: entries queued again for another attempt
+        """
+        with self._send_lock:
+            try:
+                results = self._run_coroutine(self._send_all(batch))
+            except Exception as e:
+                results = [e] * len(batch)
+        
+        retry = []
+        for (attempts, group, message), result in zip(batch, results):
+            if not isinstance(result, Exception):
+                self.sent += 1
+            elif attempts + 1 < self.max_attempts:
+                retry.append((attempts + 1, group, message))
+            else:
+                self.failed += 1
+                logger.warning("Dropping notification for %s after %s attempts: %s", group, attempts + 1, result)
+        
+        if retry:
+            with self._condition:
+                self._queue.extendleft(reversed(retry))
+        
+        return retry
+    
+    async def _send_all(self, batch):
+        channel_layer = get_channel_layer()
+        return await asyncio.gather(
+            *(channel_layer.group_send(group, message) for _, group, message in batch),
+            return_exceptions=True
+        )
+    
+    def _run_coroutine(self, coroutine):
+        loop = self._consumer_loop
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result(self.send_timeout)
+        
+        if self._own_loop is None:
+            self._own_loop = asyncio.new_event_loop()
+        return self._own_loop.run_until_complete(asyncio.wait_for(coroutine, self.send_timeout))
+    
+    def flush(self):
+        """
+        Send everything queued now, in the calling thread (one attempt each)
+        Returns: number of messages sent
+        """
+        sent = self.sent
+        batch = self._take_batch(timeout=0)
+        while batch:
+            if self.send_batch(batch):
+                break
+            batch = self._take_batch(timeout=0)
+        return self.sent - sent
+
+# Outbox for this process
+_outbox = NotificationOutbox()
+
+# Best effort delivery of what is still queued when the process exits
+atexit.register(_outbox.flush)
+
+def get_outbox():
+    """Get the notification outbox of this process"""
+    return _outbox
+
+def bind_event_loop(loop):
+    """
+    Deliver notifications on the event loop WebSocket consumers run on.
+    
+    Args:
+        loop: Running asyncio event loop
+    """
+    _outbox.bind_event_loop(loop)
+
+def notify(group, message):
+    """
+    Send a message to a channel layer group once the current transaction
+    commits (immediately outside a transaction), without waiting for it.
+    
+    Args:
+        group: Group name (e.g. 'player_1')
+        message: Message dict with a 'type' naming the consumer handler
+    """
+    transaction.on_commit(lambda: _outbox.enqueue(group, message))
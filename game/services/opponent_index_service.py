@@ -0,0 +1,238 @@
+"""
+Opponent index service module for matchmaking.
+
+Players who can be attacked (not in hospital or jail) are kept in memory per
+location and level, so finding opponents within the level range looks at a
+fixed number of buckets instead of querying the player table. Opponents are
+sampled at random across all eligible players, so every target has the same
+chance of being offered.
+
+The database stays the source of truth: the index is loaded from it on first
+use and kept current incrementally. When players travel, level up or are
+hospitalized, jailed or released, the change is appended to a shared change
+log (see change_log_service), and every process replays the changes it has
+not seen before sampling. Sampled opponents are checked against the
+database before they are returned.
+"""
+import random
+import threading
+from collections import defaultdict
+
+from ..models.player import Player
+from .change_log_service import ChangeLog
+
+# Levels above and below the player's own that count as fair opponents
+LEVEL_RANGE = 3
+
+# Index changes shared between processes
+index_changes = ChangeLog('opponent_index')
+
+# Player fields that decide where (and whether) a player is indexed
+INDEX_FIELDS = ('current_location', 'level', 'is_in_hospital', 'is_in_jail')
+
+class Bucket:
+    """
+    Player IDs with O(1) add, remove and random access
+    """
+    def __init__(self):
+        self._ids = []
+        self._positions = {}
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __getitem__(self, index):
+        return self._ids[index]
+    
+    def add(self, player_id):
+        if player_id not in self._positions:
+            self._positions[player_id] = len(self._ids)
+            self._ids.append(player_id)
+    
+    def remove(self, player_id):
+        # Move the last ID into the removed slot
+        position = self._positions.pop(player_id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if last != player_id:
+            self._ids[position] = last
+            self._positions[last] = position
+
+class OpponentIndex:
+    """
+    Eligible players bucketed by (location ID, level)
+    """
+    def __init__(self):
+        self._buckets = defaultdict(Bucket)
+        self._entries = {}
+        self._changes = index_changes.reader()
+        self._lock = threading.RLock()
+    
+    def load(self):
+        """Rebuild the index from the database"""
+        with self._lock:
+            # Changes committed during the scan are replayed afterwards
+            self._changes.reset()
+            
+            self._buckets.clear()
+            self._entries.clear()
+            
+            rows = Player.objects.filter(
+                is_in_hospital=False,
+                is_in_jail=False,
+                current_location__isnull=False
+            ).values_list('id', 'current_location_id', 'level')
+            for player_id, location_id, level in rows:
+                self._insert(player_id, (location_id, level))
+    
+    def _insert(self, player_id, key):
+        self._entries[player_id] = key
+        self._buckets[key].add(player_id)
+    
+    def _ensure_current(self):
+        pending = self._changes.pending()
+        if pending is None:
+            self.load()
+            return
+        
+        for change in pending:
+            self.update(*change)
+    
+    def update(self, player_id, location_id, level, eligible):
+        """Move a player to the bucket of their location and level"""
+        with self._lock:
+            self.discard(player_id)
+            if eligible and location_id is not None:
+                self._insert(player_id, (location_id, level))
+    
+    def discard(self, player_id):
+        """Remove a player from the index"""
+        with self._lock:
+            key = self._entries.pop(player_id, None)
+            if key is not None:
+                self._buckets[key].remove(player_id)
+    
+    def sample(self, location_id, level, exclude_id=None, limit=10):
+        """
+        Pick random eligible players at a location within LEVEL_RANGE of `level`.
+        
+        Args:
+            location_id: ID of the location
+            level: Level of the player looking for opponents
+            exclude_id: Optional player ID to leave out (the player themselves)
+            limit: Maximum number of IDs to return
+        
+        Returns:
+            List of player IDs in random order
+        """
+        with self._lock:
+            self._ensure_current()
+            
+            buckets = []
+            for candidate in range(max(1, level - LEVEL_RANGE), level + LEVEL_RANGE + 1):
+                bucket = self._buckets.get((location_id, candidate))
+                if bucket:
+                    buckets.append(bucket)
+            
+            total = sum(len(bucket) for bucket in buckets)
+            
+            # Draw one extra position in case the excluded player is drawn
+            picked = []
+            for position in random.sample(range(total), min(total, limit + 1)):
+                for bucket in buckets:
+                    if position < len(bucket):
+                        break
+                    position -= len(bucket)
+                
+                player_id = bucket[position]
+                if player_id != exclude_id:
+                    picked.append(player_id)
+            
+            return picked[:limit]
+
+# Opponent index for this process
+_index = OpponentIndex()
+
+def get_opponent_index():
+    """Get the opponent index of this process"""
+    return _index
+
+def players_changed(players):
+    """
+    Update players' places in every process's index once the transaction commits.
+    
+    Args:
+        players: Player objects holding the written values
+    """
+    index_changes.publish([
+        (player.id, player.current_location_id, player.level,
+         not player.is_in_hospital and not player.is_in_jail)
+        for player in players
+    ])
+
+def player_changed(player):
+    """Update one player's place in the index (see players_changed)"""
+    players_changed([player])
+
+def players_released(rows):
+    """
+    Index players released from hospital or jail once the transaction commits.
+    
+    Args:
+        rows: Dictionaries with the players' id, current_location_id, level,
+            is_in_hospital and is_in_jail after the release
+    """
+    index_changes.publish([
+        (row['id'], row['current_location_id'], row['level'], not row['is_in_hospital'] and not row['is_in_jail'])
+        for row in rows
+    ])
+
+def verified_opponents(player_ids, location_id, level):
+    """
+    Select the players among `player_ids` who are still valid opponents
+    (at the location, not in hospital or jail, within LEVEL_RANGE of `level`)
+    
+    Args:
+        player_ids: IDs sampled from the index
+        location_id: ID of the location
+        level: Level of the player looking for opponents
+    
+    Returns:
+        Queryset of Player objects
+    """
+    return Player.objects.filter(
+        id__in=player_ids,
+        current_location_id=location_id,
+        is_in_hospital=False,
+        is_in_jail=False,
+        level__gte=max(1, level - LEVEL_RANGE),
+        level__lte=level + LEVEL_RANGE
+    )
+
+def get_opponents(player, location, limit=10):
+    """
+    Get random opponents for a player at a location.
+    
+    Args:
+        player: Player object
+        location: Location object
+        limit: Maximum number of opponents to return
+    
+    Returns:
+        List of Player objects
+    """
+    # Players another process moved, jailed or hospitalized are dropped and replaced
+    while True:
+        ids = _index.sample(location.id, player.level, exclude_id=player.id, limit=limit)
+        if not ids:
+            return []
+        
+        opponents = verified_opponents(ids, location.id, player.level).in_bulk()
+        
+        stale = [player_id for player_id in ids if player_id not in opponents]
+        if not stale:
+            return [opponents[player_id] for player_id in ids]
+        
+        for player_id in stale:
+            _index.discard(player_id)
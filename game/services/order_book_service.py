@@ -0,0 +1,247 @@
+"""
+Order book service module for looking up the cheapest market listings.
+
+Active listings are kept in memory in books sorted by price, then creation
+time, then ID: one per item, one per item type and one for the whole
+market, so the cheapest asks for any filter are read from the front of a
+single book instead of a scan of the listing table. Expired asks are
+dropped as their time passes, through a heap ordered by expiry time.
+
+The database stays the source of truth: the book is loaded from it on first
+use and kept current incrementally. Listings created, sold, cancelled or
+expired are appended to a shared change log (see change_log_service), and
+every process replays the changes it has not seen before reading.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from django.utils import timezone
+
+from ..models.item import Item
+from ..models.market import MarketListing
+from .change_log_service import ChangeLog
+from .reference_data_service import get_reference_data
+
+# Order book changes shared between processes
+book_changes = ChangeLog('market_order_book')
+
+# Sorts by price, then created_at, then ID
+Ask = namedtuple('Ask', ['price', 'created_at', 'listing_id', 'item_id', 'seller_id', 'expires_at'])
+
+class OrderBook:
+    """
+    Asks for one item in price-time order
+    """
+    def __init__(self):
+        self._asks = []
+    
+    def __len__(self):
+        return len(self._asks)
+    
+    def add(self, ask):
+        insort(self._asks, ask)
+    
+    def remove(self, ask):
+        index = bisect_left(self._asks, ask)
+        if index < len(self._asks) and self._asks[index] == ask:
+            del self._asks[index]
+    
+    def asks(self, max_price=None):
+        """Iterate over asks from the cheapest, up to max_price"""
+        for ask in self._asks:
+            if max_price is not None and ask.price > max_price:
+                return
+            yield ask
+
+class MarketOrderBook:
+    """
+    Order books for every item, with an index of listings by ID
+    """
+    def __init__(self):
+        self._books = defaultdict(OrderBook)
+        self._type_books = defaultdict(OrderBook)
+        self._all = OrderBook()
+        self._expiries = []
+        self._asks = {}
+        self._items = {}
+        self._changes = book_changes.reader()
+        self._lock = threading.RLock()
+    
+    def load(self):
+        """Rebuild every book from the active listings in the database"""
+        with self._lock:
+            # Changes committed during the load are replayed afterwards
+            self._changes.reset()
+            
+            self._books.clear()
+            self._type_books.clear()
+            self._all = OrderBook()
+            self._expiries = []
+            self._asks.clear()
+            self._items = {
+                item.id: (item.item_type_id, item.min_level)
+                for item in get_reference_data().items.values()
+            }
+            
+            rows = MarketListing.objects.filter(status='active').values_list(
+                'price', 'created_at', 'id', 'item_id', 'seller_id', 'expires_at'
+            )
+            for row in rows:
+                self._insert(Ask(*row))
+    
+    def _insert(self, ask):
+        self._asks[ask.listing_id] = ask
+        self._books[ask.item_id].add(ask)
+        self._type_books[self._items[ask.item_id][0]].add(ask)
+        self._all.add(ask)
+        heapq.heappush(self._expiries, (ask.expires_at, ask.listing_id))
+    
+    def _drop_expired(self, now):
+        # Heap entries of listings removed since are skipped
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, listing_id = heapq.heappop(self._expiries)
+            ask = self._asks.get(listing_id)
+            if ask is not None and ask.expires_at == expires_at:
+                self.discard(listing_id)
+    
+    def _ensure_current(self):
+        pending = self._changes.pending()
+        if pending is None:
+            self.load()
+            return
+        
+        for change in pending:
+            if change[0] == 'add':
+                self.add(*change[1:])
+            else:
+                self.discard(change[1])
+    
+    def add(self, ask, item):
+        """
+        Add an active listing in this process only
+        
+        Args:
+            ask: Ask of the listing
+            item: (item_type_id, min_level) of the listed item
+        """
+        with self._lock:
+            self._items.setdefault(ask.item_id, item)
+            self.discard(ask.listing_id)
+            self._insert(ask)
+    
+    def discard(self, listing_id):
+        """Forget a listing in this process only"""
+        with self._lock:
+            ask = self._asks.pop(listing_id, None)
+            if ask is not None:
+                self._books[ask.item_id].remove(ask)
+                self._type_books[self._items[ask.item_id][0]].remove(ask)
+                self._all.remove(ask)
+    
+    def best_asks(self, item_id=None, item_type_id=None, min_level=None, max_price=None,
+                  exclude_seller_id=None, limit=20, now=None):
+        """
+        Get the cheapest unexpired asks matching the filters.
+        
+        Args:
+            item_id: Optional item filter
+            item_type_id: Optional item type filter
+            min_level: Optional player level; items above it are skipped
+            max_price: Optional maximum price
+            exclude_seller_id: Optional seller whose asks are skipped
+            limit: Maximum number of asks to return
+            now: Optional timezone-aware datetime (defaults to now)
+        
+        Returns:
+            List of Ask tuples, cheapest first
+        """
+        if now is None:
+            now = timezone.now()
+        
+        with self._lock:
+            self._ensure_current()
+            self._drop_expired(now)
+            
+            if item_id is not None:
+                if item_id not in self._items:
+                    return []
+                item_type, item_level = self._items[item_id]
+                if item_type_id is not None and item_type != item_type_id:
+                    return []
+                if min_level is not None and item_level > min_level:
+                    return []
+                book = self._books.get(item_id)
+            elif item_type_id is not None:
+                book = self._type_books.get(item_type_id)
+            else:
+                book = self._all
+            
+            best = []
+            for ask in book.asks(max_price) if book else ():
+                if ask.seller_id == exclude_seller_id:
+                    continue
+                if min_level is not None and self._items[ask.item_id][1] > min_level:
+                    continue
+                best.append(ask)
+                if len(best) >= limit:
+                    break
+            
+            return best
+
+# Order book for this process
+_book = MarketOrderBook()
+
+def get_order_book():
+    """Get the order book of this process"""
+    return _book
+
+def listing_added(listing):
+    """
+    Add a new listing to the order book once the transaction commits.
+    
+    Args:
+        listing: Active MarketListing object
+    """
+    item = get_reference_data().get(Item, listing.item_id)
+    book_changes.publish([(
+        'add',
+        Ask(listing.price, listing.created_at, listing.id, listing.item_id, listing.seller_id, listing.expires_at),
+        (item.item_type_id, item.min_level)
+    )])
+
+def listing_removed(*listing_ids):
+    """
+    Remove sold, cancelled or expired listings once the transaction commits.
+    
+    Args:
+        *listing_ids: IDs of the listings
+    """
+    book_changes.publish([('remove', listing_id) for listing_id in listing_ids])
+
+def get_best_listings(limit=20, **filters):
+    """
+    Get the cheapest active listings matching the filters.
+    
+    Args:
+        limit: Maximum number of listings to return
+        **filters: Filters accepted by MarketOrderBook.best_asks
+    
+    Returns:
+        List of MarketListing objects (with item, item type and seller), cheapest first
+    """
+    # Listings another process sold or cancelled are dropped and replaced
+    while True:
+        asks = _book.best_asks(limit=limit, **filters)
+        ids = [ask.listing_id for ask in asks]
+        
+        listings = MarketListing.objects.filter(id__in=ids, status='active').select_related(
+            'item__item_type', 'seller'
+        ).in_bulk()
+        
+        stale = [listing_id for listing_id in ids if listing_id not in listings]
+        if not stale:
+            return [listings[listing_id] for listing_id in ids]
+        
+        for listing_id in stale:
+            _book.discard(listing_id)
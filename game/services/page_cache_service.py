@@ -0,0 +1,103 @@
+"""
+Page cache service module for versioned template fragment caching.
+
+Fragments are cached with the {% cache %} tag and keyed by versions rather
+than deleted: the reference data version for fragments built from static
+game data, and a per-player state version for fragments showing one
+player's data. Services that change a player's state bump that player's
+version once the transaction commits, so the next render uses a new key
+and the old entry simply expires. Versions and fragments live in the shared
+cache, so bumps made by Celery and scheduler processes reach every web
+process. Fragments showing names from reference data (crime types,
+locations) include its version as well.
+
+Values that change without a write (energy and health regenerate over
+time) must be part of a fragment's key instead.
+"""
+import time
+from functools import cached_property
+from django.core.cache import cache
+from django.db import transaction
+
+from .reference_data_service import get_reference_data
+
+# Seconds a cached fragment is kept
+FRAGMENT_TIMEOUT = 600
+
+PLAYER_VERSION_KEY = 'player_state_version:{}'
+
+def _initial_version():
+    # A lost version must not restart at a number that was used before
+    return time.time_ns() // 1000
+
+def player_version(player_id):
+    """
+    Get the state version of a player
+    
+    Args:
+        player_id: ID of the player
+    
+    Returns:
+        int version
+    """
+    key = PLAYER_VERSION_KEY.format(player_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+def players_state_changed(player_ids):
+    """
+    Invalidate the cached fragments of players once the transaction commits
+    
+    Args:
+        player_ids: IDs of the players whose state changed
+    """
+    player_ids = list(player_ids)
+    
+    def bump():
+        for player_id in player_ids:
+            key = PLAYER_VERSION_KEY.format(player_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _initial_version(), timeout=None)
+    
+    transaction.on_commit(bump)
+
+def player_state_changed(player_id):
+    """Invalidate the cached fragments of one player once the transaction commits"""
+    players_state_changed([player_id])
+
+class FragmentVersions:
+    """
+    Cache key parts for the fragments of a page, read only when a template
+    uses them
+    """
+    timeout = FRAGMENT_TIMEOUT
+    
+    def __init__(self, player):
+        self.player_id = player.id
+    
+    @cached_property
+    def reference(self):
+        """Version of the reference data"""
+        return get_reference_data().version
+    
+    @cached_property
+    def player(self):
+        """Version of the player's state"""
+        return player_version(self.player_id)
+
+def fragment_versions(player):
+    """
+    Get the cache key parts for a player's page fragments
+    
+    Args:
+        player: Player viewing the page
+    
+    Returns:
+        FragmentVersions object (passed to templates as page_cache)
+    """
+    return FragmentVersions(player)
@@ -6,6 +6,10 @@ from django.db.models import F
 
 from ..models.property import Property, PropertyType
 from ..models.location import Location
+from ..models.unit_of_work import unit_of_work
+from . import ledger_service
+from .page_cache_service import player_state_changed
+from .reference_data_service import get_reference_data
 
 def get_available_properties(player, location=None, limit=20):
     """
@@ -19,11 +23,11 @@ def get_available_properties(player, location=None, limit=20):
     Returns:
         List of PropertyType objects
     """
-    # Get property types that match player's level
-    property_types = PropertyType.objects.filter(min_level__lte=player.level)
+    # Get property types that match player's level, cheapest first
+    property_types = get_reference_data().available_property_types(player.level)
     
     # You might apply other filters here based on game rules
-    return property_types.order_by('base_price')[:limit]
+    return property_types[:limit]
 
 def get_player_properties(player, location=None, include_inactive=False):
     """
@@ -47,6 +51,7 @@ def get_player_properties(player, location=None, include_inactive=False):
     
     return properties.order_by('-income_rate')
 
+@unit_of_work()
 def purchase_property(player, property_type_id, location_id, name):
     """
     Purchase a new property.
@@ -64,8 +69,9 @@ def purchase_property(player, property_type_id, location_id, name):
         ValueError: If purchase validation fails
     """
     try:
-        property_type = PropertyType.objects.get(id=property_type_id)
-        location = Location.objects.get(id=location_id)
+        reference_data = get_reference_data()
+        property_type = reference_data.get(PropertyType, property_type_id)
+        location = reference_data.get(Location, location_id)
     except (PropertyType.DoesNotExist, Location.DoesNotExist):
         raise ValueError("Invalid property type or location.")
     
@@ -73,8 +79,8 @@ def purchase_property(player, property_type_id, location_id, name):
     if player.level < property_type.min_level:
         raise ValueError(f"You need to be level {property_type.min_level} to purchase this property.")
     
-    # Check if player has enough money
-    if player.cash < property_type.base_price:
+    # Check and deduct money in one statement
+    if not ledger_service.spend_cash(player, property_type.base_price):
         raise ValueError(f"Not enough cash. You need {property_type.base_price} but have {player.cash}.")
     
     # Create the property
@@ -87,20 +93,22 @@ def purchase_property(player, property_type_id, location_id, name):
         location=location,
         income_rate=property_type.base_income
     )
-    
-    # Deduct money from player
-    player.cash -= property_type.base_price
-    player.save()
+    player_state_changed(player.id)
     
     return new_property
 
-def collect_property_income(player, property_id=None):
+@unit_of_work()
+def collect_property_income(player, property_id=None, now=None):
     """
     Collect income from a player's property or all properties.
     
+    Income is computed in SQL for every property at once, then the cash is
+    credited and the collection times reset with one UPDATE each.
+    
     Args:
         player: Player collecting income
         property_id: Optional specific property ID to collect from
+        now: Optional timezone-aware datetime (defaults to now)
         
     Returns:
         Total income collected
@@ -108,26 +116,29 @@ def collect_property_income(player, property_id=None):
     Raises:
         ValueError: If property doesn't belong to player
     """
-    total_income = 0
+    if now is None:
+        now = timezone.now()
     
-    # Collect from specific property
+    properties = Property.objects.filter(player=player, is_active=True)
     if property_id:
-        try:
-            player_property = Property.objects.get(id=property_id, player=player, is_active=True)
-            income = player_property.collect_income()
-            total_income += income
-        except Property.DoesNotExist:
-            raise ValueError("Property not found or doesn't belong to you.")
-    
-    # Collect from all properties
-    else:
-        properties = get_player_properties(player)
-        for player_property in properties:
-            try:
-                income = player_property.collect_income()
-                total_income += income
-            except Exception:
-                continue
+        properties = properties.filter(id=property_id)
+    
+    # Lock the rows so a concurrent collection cannot pay the same income twice
+    accrued = list(properties.select_for_update().annotate(
+        income=Property.accrued_income(now)
+    ).values_list('id', 'income'))
+    
+    if property_id and not accrued:
+        raise ValueError("Property not found or doesn't belong to you.")
+    
+    collected = {pk: income for pk, income in accrued if income > 0}
+    if not collected:
+        return 0
+    
+    Property.objects.filter(id__in=collected).update(last_income_collection=now)
+    
+    total_income = sum(collected.values())
+    ledger_service.credit_cash(player, total_income)
     
     return total_income
 
@@ -151,18 +162,14 @@ def upgrade_property(player, property_id):
         raise ValueError("Property not found or doesn't belong to you.")
     
     # Calculate upgrade cost based on current level
-    upgrade_cost = player_property.current_value * 0.5
+    upgrade_cost = int(player_property.current_value * Property.UPGRADE_COST_FACTOR)
     
-    # Check if player can afford upgrade
-    if player.cash < upgrade_cost:
+    # Process the upgrade (cash is checked and spent in one statement)
+    player_property.player = player
+    success, message = player_property.upgrade(upgrade_cost)
+    if not success:
         raise ValueError(f"Not enough cash. You need {upgrade_cost} but have {player.cash}.")
-    
-    # Process the upgrade
-    player_property.upgrade(upgrade_cost)
-    
-    # Deduct money from player
-    player.cash -= upgrade_cost
-    player.save()
+    player_state_changed(player.id)
     
     return player_property
 
@@ -189,11 +196,11 @@ def sell_property(player, property_id):
     sell_price = int(player_property.current_value * 0.7)  # 70% of current value
     
     # Add money to player
-    player.cash += sell_price
-    player.save()
+    ledger_service.credit_cash(player, sell_price)
     
     # Mark property as inactive
     player_property.is_active = False
     player_property.save()
+    player_state_changed(player.id)
     
     return sell_price
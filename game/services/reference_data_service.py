@@ -0,0 +1,171 @@
+"""
+Reference data service module for caching static game data in process.
+
+Crime types, item types, items, property types, locations and location
+connections only change through the admin, so every process keeps all of
+them in memory and reads them without queries. Saves and deletes bump a
+version counter in the shared cache (see game.signals and CACHES in the
+settings), and every process reloads the data when it sees a new version.
+
+Cached objects are shared between requests and must not be modified.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+from ..models.crime import CrimeType
+from ..models.item import Item, ItemType
+from ..models.location import Location, LocationConnection
+from ..models.property import PropertyType
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'reference_data_version'
+
+class ReferenceData:
+    """
+    Reference data objects with lookups by ID and by level
+    """
+    # Version of the shared data this was loaded at
+    version = None
+    
+    def __init__(self, crime_types, item_types, items, property_types, locations, connections):
+        self.item_types = {item_type.id: item_type for item_type in item_types}
+        self.locations = {location.id: location for location in locations}
+        
+        # Point foreign keys at the shared objects instead of loading copies
+        self.items = {}
+        for item in items:
+            item.item_type = self.item_types[item.item_type_id]
+            self.items[item.id] = item
+        
+        self.connections = defaultdict(dict)
+        for connection in connections:
+            connection.from_location = self.locations[connection.from_location_id]
+            connection.to_location = self.locations[connection.to_location_id]
+            self.connections[connection.from_location_id][connection.to_location_id] = connection
+        
+        self.crime_types = {crime_type.id: crime_type for crime_type in crime_types}
+        self.property_types = {property_type.id: property_type for property_type in property_types}
+        
+        # Orders the views list them in
+        self._crime_types = sorted(crime_types, key=lambda crime_type: (crime_type.min_level, crime_type.id))
+        self._property_types = sorted(property_types, key=lambda property_type: (property_type.base_price, property_type.id))
+        self._locations = sorted(locations, key=lambda location: (location.district or '', location.name, location.id))
+        self._item_types = sorted(item_types, key=lambda item_type: item_type.id)
+        
+        # Locations grouped by district, in the same order
+        self.districts = {}
+        for location in self._locations:
+            self.districts.setdefault(location.district, []).append(location)
+    
+    def get(self, model, object_id):
+        """
+        Get a cached object by ID
+        
+        Raises:
+            model.DoesNotExist: If there is no such object
+        """
+        objects = {
+            CrimeType: self.crime_types,
+            ItemType: self.item_types,
+            Item: self.items,
+            PropertyType: self.property_types,
+            Location: self.locations,
+        }[model]
+        try:
+            return objects[int(object_id)]
+        except (KeyError, TypeError, ValueError):
+            raise model.DoesNotExist(f"{model.__name__} matching ID {object_id!r} does not exist.")
+    
+    def available_crimes(self, level):
+        """Crime types a player of `level` can commit, by minimum level"""
+        return [crime_type for crime_type in self._crime_types if crime_type.min_level <= level]
+    
+    def available_property_types(self, level):
+        """Property types a player of `level` can buy, by base price"""
+        return [property_type for property_type in self._property_types if property_type.min_level <= level]
+    
+    def all_locations(self, max_level=None):
+        """Locations by district and name, optionally only up to a minimum level"""
+        if max_level is None:
+            return list(self._locations)
+        return [location for location in self._locations if location.min_level <= max_level]
+    
+    def all_item_types(self):
+        """Item types by ID"""
+        return list(self._item_types)
+    
+    def connections_from(self, location_id):
+        """Connections leaving a location, by destination name"""
+        return sorted(self.connections[location_id].values(), key=lambda connection: connection.to_location.name)
+    
+    def connection(self, from_location_id, to_location_id):
+        """The direct connection between two locations, or None"""
+        return self.connections[from_location_id].get(to_location_id)
+
+def _initial_version():
+    # Versions also key cached page fragments, so a lost version must not
+    # restart at a number that was used before
+    return time.time_ns() // 1000
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def load_reference_data():
+    """
+    Load all reference data from the database
+    Returns: ReferenceData
+    """
+    return ReferenceData(
+        # Reward lists are prefetched, so award_random_item needs no query
+        list(CrimeType.objects.prefetch_related('possible_rewards')),
+        list(ItemType.objects.all()),
+        list(Item.objects.all()),
+        list(PropertyType.objects.all()),
+        list(Location.objects.all()),
+        list(LocationConnection.objects.all())
+    )
+
+# Reference data for this process and the version it was loaded at
+_data = None
+_data_version = None
+_data_lock = threading.Lock()
+
+def get_reference_data():
+    """Get the reference data of this process, reloading it if it changed"""
+    global _data, _data_version
+    
+    version = _shared_version()
+    with _data_lock:
+        if _data is None or _data_version != version:
+            _data = load_reference_data()
+            _data.version = _data_version = version
+        return _data
+
+def preload():
+    """
+    Load the reference data when a server process starts, so the first
+    requests do not pay for it (it is loaded on first use if this fails)
+    """
+    try:
+        get_reference_data()
+    except DatabaseError as e:
+        logger.warning("Could not preload reference data: %s", e)
+
+def reference_data_changed():
+    """Reload reference data in every process once the transaction commits"""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+    
+    transaction.on_commit(bump)
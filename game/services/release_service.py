@@ -0,0 +1,248 @@
+"""
+Release service module for scheduling hospital and jail releases.
+"""
+import heapq
+import logging
+import threading
+from datetime import timedelta
+from django.utils import timezone
+from django.db.models import F
+
+from ..models.player import Player
+from . import opponent_index_service, page_cache_service
+from .status_service import send_delta
+
+logger = logging.getLogger(__name__)
+
+# Status name -> (flag field, release time field)
+RELEASE_FIELDS = {
+    'hospital': ('is_in_hospital', 'hospital_release_time'),
+    'jail': ('is_in_jail', 'jail_release_time'),
+}
+
+def get_pending_releases(until, limit=1000):
+    """
+    Get upcoming releases ordered by release time.
+    
+    Args:
+        until: Only include releases due at or before this time
+        limit: Maximum number of releases per status
+    
+    Returns:
+        List of (release_time, player_id, status) tuples
+    """
+    pending = []
+    
+    for status, (flag, time_field) in RELEASE_FIELDS.items():
+        rows = Player.objects.filter(**{
+            flag: True,
+            f'{time_field}__lte': until,
+        }).order_by(time_field).values_list(time_field, 'id')[:limit]
+        
+        pending.extend((release_time, player_id, status) for release_time, player_id in rows)
+    
+    return sorted(pending)
+
+def release_players(status, player_ids, now=None):
+    """
+    Release a batch of players from hospital or jail.
+    
+    Players whose release time has moved into the future since they were
+    scheduled are left alone.
+    
+    Args:
+        status: 'hospital' or 'jail'
+        player_ids: IDs of players to release
+        now: Optional timezone-aware datetime (defaults to now)
+    
+    Returns:
+        Number of players released
+    """
+    if now is None:
+        now = timezone.now()
+    
+    flag, time_field = RELEASE_FIELDS[status]
+    due = Player.objects.filter(**{
+        'id__in': player_ids,
+        flag: True,
+        f'{time_field}__lte': now,
+    })
+    
+    released = list(due.values(
+        'id', 'max_health', 'current_location_id', 'level', 'is_in_hospital', 'is_in_jail'
+    ))
+    if not released:
+        return 0
+    
+    updates = {flag: False, time_field: None}
+    if status == 'hospital':
+        updates['health'] = F('max_health')
+    
+    due.filter(id__in=[row['id'] for row in released]).update(**updates)
+    
+    for row in released:
+        data = {flag: False, time_field: None}
+        if status == 'hospital':
+            data['health'] = row['max_health']
+        send_delta(row['id'], data)
+        row[flag] = False
+    
+    opponent_index_service.players_released(released)
+    page_cache_service.players_state_changed(row['id'] for row in released)
+    
+    return len(released)
+
+def release_due_players(now=None, batch_size=500):
+    """
+    Release every player whose hospital or jail time is over.
+    
+    Args:
+        now: Optional timezone-aware datetime (defaults to now)
+        batch_size: Number of players released per UPDATE
+    
+    Returns:
+        Number of players released
+    """
+    if now is None:
+        now = timezone.now()
+    
+    count = 0
+    for status, (flag, time_field) in RELEASE_FIELDS.items():
+        while True:
+            player_ids = list(Player.objects.filter(**{
+                flag: True,
+                f'{time_field}__lte': now,
+            }).order_by(time_field).values_list('id', flat=True)[:batch_size])
+            
+            released = release_players(status, player_ids, now) if player_ids else 0
+            if not released:
+                break
+            count += released
+    
+    return count
+
+def release_if_due(player, now=None):
+    """
+    Release an already loaded player whose hospital or jail time is over.
+    
+    Fallback for the request path in case no scheduler has released the
+    player yet; it only queries when a release is actually due.
+    
+    Args:
+        player: Player object (updated in place)
+        now: Optional timezone-aware datetime (defaults to now)
+    
+    Returns:
+        List of statuses the player was released from
+    """
+    if now is None:
+        now = timezone.now()
+    
+    released = []
+    for status, (flag, time_field) in RELEASE_FIELDS.items():
+        release_time = getattr(player, time_field)
+        if getattr(player, flag) and release_time is not None and release_time <= now:
+            if release_players(status, [player.id], now):
+                released.append(status)
+            # Read back whatever state the database ended up with
+            player.refresh_from_db(fields=[flag, time_field, 'health'])
+    
+    return released
+
+class ReleaseScheduler:
+    """
+    Releases players at their exact release time.
+    
+    Pending releases are kept in a heap ordered by release time. Every
+    refill interval the heap is refilled from the database (through the
+    release time indexes) with everything due within the lookahead window,
+    so releases scheduled by other processes are at most one refill
+    interval late. Players who make a request are released on time either
+    way (see release_if_due).
+    """
+    def __init__(self, lookahead=60, refill_interval=5, batch_size=500):
+        self.lookahead = timedelta(seconds=lookahead)
+        self.refill_interval = timedelta(seconds=refill_interval)
+        self.batch_size = batch_size
+        self._heap = []
+        self._queued = set()
+        self._condition = threading.Condition()
+        self._stopped = False
+    
+    def schedule(self, release_time, player_id, status):
+        """Add a release to the heap and wake the scheduler if it is earlier"""
+        entry = (release_time, player_id, status)
+        
+        with self._condition:
+            if entry in self._queued:
+                return
+            self._queued.add(entry)
+            heapq.heappush(self._heap, entry)
+            
+            if self._heap[0] == entry:
+                self._condition.notify()
+    
+    def refill(self, now=None):
+        """Load releases due within the lookahead window from the database"""
+        if now is None:
+            now = timezone.now()
+        
+        for entry in get_pending_releases(now + self.lookahead):
+            self.schedule(*entry)
+    
+    def run_pending(self, now=None):
+        """
+        Release every player whose scheduled time has passed.
+        
+        Returns:
+            Number of players released
+        """
+        if now is None:
+            now = timezone.now()
+        
+        due = {status: [] for status in RELEASE_FIELDS}
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                self._queued.discard(entry)
+                due[entry[2]].append(entry[1])
+        
+        count = 0
+        for status, player_ids in due.items():
+            for start in range(0, len(player_ids), self.batch_size):
+                count += release_players(status, player_ids[start:start + self.batch_size], now)
+        
+        return count
+    
+    def run_forever(self):
+        """Release players as they fall due until stop() is called"""
+        next_refill = timezone.now()
+        
+        while not self._stopped:
+            now = timezone.now()
+            
+            try:
+                if now >= next_refill:
+                    self.refill(now)
+                    next_refill = now + self.refill_interval
+                
+                released = self.run_pending(now)
+                if released:
+                    logger.info("Released %s players", released)
+            except Exception:
+                logger.exception("Failed to release players")
+            
+            with self._condition:
+                wake_at = next_refill
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                
+                timeout = (wake_at - timezone.now()).total_seconds()
+                if timeout > 0 and not self._stopped:
+                    self._condition.wait(timeout)
+    
+    def stop(self):
+        """Stop run_forever() after the current iteration"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
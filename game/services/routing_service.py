@@ -0,0 +1,241 @@
+"""
+Routing service module for planning travel over location connections.
+
+Shortest paths are found with Dijkstra's algorithm, either by travel time
+or by travel cost (ties broken by the other one). The whole shortest-path
+tree from an origin is computed at once and cached, so every later route
+from that origin is a walk back along the tree. Trees are also cached per
+level tier: a player can only pass through locations whose minimum level
+they meet.
+
+The graph is loaded from the database on first use and rebuilt when
+locations or connections change (tracked by a version counter in the
+shared cache).
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict, namedtuple
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models.location import Location, LocationConnection
+
+VERSION_KEY = 'route_graph_version'
+
+# Metric -> (index of the primary weight, index of the tie breaker) in an edge
+METRICS = {
+    'time': (1, 2),
+    'cost': (2, 1),
+}
+
+# Shortest-path trees kept per graph (least recently used are evicted)
+MAX_TREES = 256
+
+Route = namedtuple('Route', ['location_ids', 'travel_time', 'travel_cost'])
+
+class RouteGraph:
+    """
+    Directed location graph with cached shortest-path trees
+    """
+    def __init__(self, connections, min_levels, names=None):
+        """
+        Args:
+            connections: Iterable of (from_id, to_id, travel_time, travel_cost)
+            min_levels: Dictionary of location ID -> minimum level
+            names: Optional dictionary of location ID -> name
+        """
+        self.min_levels = dict(min_levels)
+        self.names = names or {}
+        self.edges = defaultdict(list)
+        for from_id, to_id, travel_time, travel_cost in connections:
+            self.edges[from_id].append((to_id, travel_time, travel_cost))
+        
+        self._tiers = sorted(set(self.min_levels.values()))
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def tier(self, level):
+        """Highest minimum level a player of `level` can enter (None: no limit)"""
+        if level is None:
+            return None
+        index = bisect_right(self._tiers, level)
+        return self._tiers[index - 1] if index else 0
+    
+    def shortest_paths(self, origin_id, by='time', level=None):
+        """
+        Get the shortest-path tree from an origin.
+        
+        Args:
+            origin_id: ID of the origin location
+            by: 'time' or 'cost'
+            level: Optional player level; locations above it are avoided
+        
+        Returns:
+            Dictionary of location ID -> (travel time, travel cost, previous location ID)
+        """
+        if by not in METRICS:
+            raise ValueError(f"Unknown route metric: {by}")
+        
+        key = (origin_id, by, self.tier(level))
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None:
+                self._trees.move_to_end(key)
+                return tree
+        
+        tree = self._dijkstra(origin_id, by, key[2])
+        
+        with self._lock:
+            self._trees[key] = tree
+            while len(self._trees) > MAX_TREES:
+                self._trees.popitem(last=False)
+        return tree
+    
+    def _dijkstra(self, origin_id, by, max_level):
+        primary, secondary = METRICS[by]
+        edges = self.edges
+        min_levels = self.min_levels
+        
+        tree = {origin_id: (0, 0, None)}
+        best = {origin_id: (0, 0)}
+        heap = [(0, 0, origin_id)]
+        done = set()
+        
+        while heap:
+            weight, tie, location_id = heapq.heappop(heap)
+            if location_id in done:
+                continue
+            done.add(location_id)
+            
+            travel_time, travel_cost, _ = tree[location_id]
+            for edge in edges.get(location_id, ()):
+                to_id = edge[0]
+                if to_id in done:
+                    continue
+                if max_level is not None and min_levels.get(to_id, 0) > max_level:
+                    continue
+                
+                candidate = (weight + edge[primary], tie + edge[secondary])
+                if to_id not in best or candidate < best[to_id]:
+                    best[to_id] = candidate
+                    tree[to_id] = (travel_time + edge[1], travel_cost + edge[2], location_id)
+                    heapq.heappush(heap, (candidate[0], candidate[1], to_id))
+        
+        return tree
+    
+    def route(self, origin_id, destination_id, by='time', level=None):
+        """
+        Plan the shortest route between two locations.
+        
+        Args:
+            origin_id: ID of the origin location
+            destination_id: ID of the destination location
+            by: 'time' or 'cost'
+            level: Optional player level; locations above it are avoided
+        
+        Returns:
+            Route (location IDs from origin to destination and totals), or None
+            if the destination cannot be reached
+        """
+        tree = self.shortest_paths(origin_id, by, level)
+        if destination_id not in tree:
+            return None
+        
+        travel_time, travel_cost, _ = tree[destination_id]
+        location_ids = []
+        location_id = destination_id
+        while location_id is not None:
+            location_ids.append(location_id)
+            location_id = tree[location_id][2]
+        location_ids.reverse()
+        
+        return Route(location_ids, travel_time, travel_cost)
+    
+    def warm(self, by='time', level=None):
+        """Precompute the shortest-path trees from every location"""
+        for origin_id in self.min_levels:
+            self.shortest_paths(origin_id, by, level)
+
+def _initial_version():
+    # A lost version must not restart at a number a process has loaded
+    return time.time_ns() // 1000
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def load_graph():
+    """
+    Build the route graph from the database
+    Returns: RouteGraph
+    """
+    locations = list(Location.objects.values_list('id', 'min_level', 'name'))
+    connections = LocationConnection.objects.values_list(
+        'from_location_id', 'to_location_id', 'travel_time', 'travel_cost'
+    )
+    return RouteGraph(
+        connections,
+        {location_id: min_level for location_id, min_level, _ in locations},
+        {location_id: name for location_id, _, name in locations}
+    )
+
+# Route graph for this process and the version it was loaded at
+_graph = None
+_graph_version = None
+_graph_lock = threading.Lock()
+
+def get_route_graph():
+    """Get the route graph of this process, reloading it if the map changed"""
+    global _graph, _graph_version
+    
+    version = _shared_version()
+    with _graph_lock:
+        if _graph is None or _graph_version != version:
+            _graph = load_graph()
+            _graph_version = version
+        return _graph
+
+def map_changed():
+    """Rebuild route graphs in every process once the transaction commits"""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+    
+    transaction.on_commit(bump)
+
+def plan_route(origin, destination, by='time', level=None):
+    """
+    Plan the shortest route between two locations.
+    
+    Args:
+        origin: Location object or ID to start from
+        destination: Location object or ID to travel to
+        by: 'time' or 'cost'
+        level: Optional player level; locations above it are avoided
+    
+    Returns:
+        Route, or None if the destination cannot be reached
+    """
+    origin_id = getattr(origin, 'id', origin)
+    destination_id = getattr(destination, 'id', destination)
+    return get_route_graph().route(origin_id, destination_id, by, level)
+
+def describe_route(route):
+    """
+    Describe a route for players.
+    
+    Args:
+        route: Route object
+    
+    Returns:
+        List of dictionaries with each stop's id and name
+    """
+    names = get_route_graph().names
+    return [{'id': location_id, 'name': names.get(location_id)} for location_id in route.location_ids]
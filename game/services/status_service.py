@@ -0,0 +1,130 @@
+"""
+Status service module for pushing player status to WebSocket clients.
+
+Clients get a full snapshot when they connect (or ask to resync) and then
+only field-level deltas, sent when a write of the player's status fields
+commits. Energy and health regenerate over time without being written, so
+the snapshot and deltas carry the stored values together with the refill
+times; current values are derived from them (see current_status) instead
+of being read again from the database.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models.player import Player
+from .notification_service import notify
+
+# Player fields pushed to clients (current_location is sent by name)
+STATUS_FIELDS = (
+    'level', 'experience', 'cash',
+    'energy', 'max_energy', 'last_energy_refill',
+    'health', 'max_health', 'last_health_refill',
+    'current_location',
+    'is_in_hospital', 'hospital_release_time',
+    'is_in_jail', 'jail_release_time',
+)
+
+DATETIME_FIELDS = (
+    'last_energy_refill', 'last_health_refill',
+    'hospital_release_time', 'jail_release_time',
+)
+
+def _value(player, field):
+    if field == 'current_location':
+        if player.current_location_id is None:
+            return None
+        return player.current_location.name
+    
+    value = getattr(player, field)
+    if field in DATETIME_FIELDS and value is not None:
+        return value.isoformat()
+    return value
+
+def _key(field):
+    return 'location' if field == 'current_location' else field
+
+def serialize_status(player):
+    """
+    Serialize the stored status of a player.
+    
+    Args:
+        player: Player object (with current_location, to avoid a query)
+    
+    Returns:
+        Dictionary of status fields (datetimes as ISO strings)
+    """
+    status = {_key(field): _value(player, field) for field in STATUS_FIELDS}
+    status['id'] = player.id
+    status['nickname'] = player.nickname
+    return status
+
+def status_changed(player, field_names):
+    """
+    Push the status fields among `field_names` to the player's WebSocket
+    group once the current transaction commits.
+    
+    Args:
+        player: Player object holding the written values
+        field_names: Names of the fields that were written
+    """
+    fields = [
+        field for field in STATUS_FIELDS
+        if field in field_names or f'{field}_id' in field_names
+    ]
+    if fields:
+        send_delta(player.id, {_key(field): _value(player, field) for field in fields})
+
+def send_delta(player_id, data):
+    """
+    Push changed status fields to the player's WebSocket group.
+    
+    Args:
+        player_id: ID of the player
+        data: Dictionary of changed fields, as produced by serialize_status
+    """
+    notify(f'player_{player_id}', {
+        'type': 'player_update',
+        'data': data
+    })
+
+def current_status(status, now=None):
+    """
+    Derive the current status from a serialized one without any queries,
+    applying regeneration and releases that are due (as Player does).
+    
+    Args:
+        status: Dictionary produced by serialize_status (with deltas applied)
+        now: Optional timezone-aware datetime (defaults to now)
+    
+    Returns:
+        Dictionary of current status values
+    """
+    if now is None:
+        now = timezone.now()
+    
+    current = dict(status)
+    times = {
+        field: parse_datetime(status[field]) if status.get(field) else None
+        for field in DATETIME_FIELDS
+    }
+    
+    if current['is_in_hospital'] and times['hospital_release_time'] and now >= times['hospital_release_time']:
+        current['is_in_hospital'] = False
+        current['hospital_release_time'] = None
+        current['health'] = current['max_health']
+    
+    if current['is_in_jail'] and times['jail_release_time'] and now >= times['jail_release_time']:
+        current['is_in_jail'] = False
+        current['jail_release_time'] = None
+    
+    current['energy'] = Player._regenerated(
+        status['energy'], status['max_energy'], times['last_energy_refill'],
+        Player.ENERGY_REGEN_INTERVAL, now
+    )[0]
+    if current['is_in_hospital'] == status['is_in_hospital']:
+        current['health'] = Player._regenerated(
+            status['health'], status['max_health'], times['last_health_refill'],
+            Player.HEALTH_REGEN_INTERVAL, now
+        )[0]
+    
+    return current
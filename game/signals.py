@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User  # Use Django's default User model
-from game.models import Player, Location
+from game.models import CrimeType, Item, ItemType, Player, PropertyType, Location, LocationConnection
+from game.services import opponent_index_service, reference_data_service, routing_service
 
 # User = get_user_model()  # Comment out custom user model reference
 
@@ -24,8 +25,32 @@ def create_player_for_new_user(sender, instance, created, **kwargs):
         )
         
         # Create a new player for this user
-        Player.objects.create(
+        player = Player.objects.create(
             user=instance,
             nickname=instance.username,  # Default nickname is username
             current_location=default_location
-        ) 
\ No newline at end of file
+        )
+        
+        # Offer the new player as an opponent right away
+        opponent_index_service.player_changed(player)
+
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=LocationConnection)
+def rebuild_route_graph(sender, **kwargs):
+    """
+    Rebuild cached travel routes when the map changes
+    """
+    routing_service.map_changed()
+
+@receiver([post_save, post_delete], sender=CrimeType)
+@receiver([post_save, post_delete], sender=ItemType)
+@receiver([post_save, post_delete], sender=Item)
+@receiver([post_save, post_delete], sender=PropertyType)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=LocationConnection)
+@receiver(m2m_changed, sender=CrimeType.possible_rewards.through)
+def reload_reference_data(sender, **kwargs):
+    """
+    Reload cached reference data in every process when it changes
+    """
+    reference_data_service.reference_data_changed()
\ No newline at end of file
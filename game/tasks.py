@@ -1,42 +1,123 @@
+import logging
+import time
 from celery import shared_task
 from django.utils import timezone
+from django.db.models import Case, F, Max, Min, When
+from django.db.models.lookups import GreaterThanOrEqual
 from datetime import timedelta
 
+logger = logging.getLogger(__name__)
+
 @shared_task
-def regenerate_all_player_resources():
+def regenerate_all_player_resources(chunk_size=5000):
     """
     Task to regenerate energy and health for all players
-    This is a backup to the middleware regeneration
+    
+    Runs as set-based UPDATEs over primary key ranges so the database does
+    the work; energy and health are also derived at read time, so this only
+    keeps stored values from drifting too far.
     """
     from game.models import Player
+    from game.services.release_service import release_due_players
+    
+    now = timezone.now()
+    
+    # Release players whose hospital/jail time is over (this also updates
+    # WebSocket clients, the opponent index and the page cache)
+    released = release_due_players(now)
+    
+    bounds = Player.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return "Updated resources for 0 players"
+    
+    totals = {'energy': 0, 'health': 0, 'released': released}
+    
+    for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+        started = time.monotonic()
+        chunk = Player.objects.filter(id__gte=start, id__lt=start + chunk_size)
+        
+        energy = _regenerate_resource(
+            chunk, 'energy', 'max_energy', 'last_energy_refill',
+            Player.ENERGY_REGEN_INTERVAL, now
+        )
+        health = _regenerate_resource(
+            chunk, 'health', 'max_health', 'last_health_refill',
+            Player.HEALTH_REGEN_INTERVAL, now
+        )
+        
+        totals['energy'] += energy
+        totals['health'] += health
+        
+        logger.info(
+            "Regenerated players %s-%s: energy=%s health=%s in %.3fs",
+            start, start + chunk_size - 1, energy, health,
+            time.monotonic() - started
+        )
     
-    players = Player.objects.all()
-    updated_count = 0
+    return (
+        f"Updated resources for {totals['energy'] + totals['health']} rows "
+        f"(energy: {totals['energy']}, health: {totals['health']}, "
+        f"released: {totals['released']})"
+    )
+
+def _regenerate_resource(queryset, field, max_field, refill_field, interval, now):
+    """
+    Apply regeneration to one resource column with a single UPDATE
+    
+    Mirrors Player._regenerated: add one point per elapsed interval, cap at the
+    maximum and advance the refill time by the intervals consumed.
+    
+    Returns:
+        int: Number of rows updated
+    """
+    from game.models.functions import AddSeconds, ElapsedSeconds
     
-    for player in players:
-        player.regenerate_energy()
-        player.regenerate_health()
-        player.check_status()  # Check if player should be released from hospital/jail
-        updated_count += 1
+    points = ElapsedSeconds(F(refill_field), now) / interval
+    capped = GreaterThanOrEqual(F(field) + points, F(max_field))
     
-    return f"Updated resources for {updated_count} players"
+    return queryset.filter(**{
+        f'{field}__lt': F(max_field),
+        f'{refill_field}__lte': now - timedelta(seconds=interval),
+    }).update(**{
+        field: Case(
+            When(capped, then=F(max_field)),
+            default=F(field) + points
+        ),
+        refill_field: Case(
+            When(capped, then=F(refill_field)),
+            default=AddSeconds(F(refill_field), points * interval)
+        ),
+    })
 
 @shared_task
 def expire_old_market_listings():
     """
     Task to expire old market listings
     """
-    from game.models import MarketListing
+    from game.services.market_service import expire_listings
     
-    # Find active listings that have expired
-    expired_listings = MarketListing.objects.filter(
-        status='active',
-        expires_at__lte=timezone.now()
-    )
-    
-    expired_count = 0
-    for listing in expired_listings:
-        if listing.check_expiry():
-            expired_count += 1
+    expired_count = expire_listings()
     
     return f"Expired {expired_count} market listings"
+
+@shared_task
+def release_due_players():
+    """
+    Task to release players whose hospital/jail time is over
+    Fallback for deployments not running the release scheduler
+    """
+    from game.services.release_service import release_due_players as release
+    
+    return f"Released {release()} players"
+
+@shared_task
+def report_property_economy():
+    """
+    Nightly task summarizing the property economy
+    """
+    from game.services.economy_service import get_economy_report
+    
+    report = get_economy_report()
+    logger.info("Property economy: %s", report)
+    
+    return report
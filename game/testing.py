@@ -0,0 +1,111 @@
+"""
+Helpers for testing game views.
+"""
+import re
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+# Plan lines reading a whole table, per database vendor
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+
+def assert_query_budget(client, url, method='get', budget=None, **kwargs):
+    """
+    Request a URL and fail if the view runs more SQL queries than its budget.
+    
+    Args:
+        client: django.test.Client (logged in as needed)
+        url: URL to request
+        method: HTTP method name on the client ('get', 'post', ...)
+        budget: Maximum number of queries (defaults to the view's @query_budget)
+        **kwargs: Passed on to the client method
+    
+    Returns:
+        The response
+    """
+    if budget is None:
+        budget = getattr(resolve(url).func, 'query_budget', None)
+        if budget is None:
+            raise ValueError(f"No query budget declared for {url}")
+    
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, **kwargs)
+    
+    if len(queries) > budget:
+        statements = '\n'.join(
+            f"{i}. {query['sql']}" for i, query in enumerate(queries.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f"{method.upper()} {url} ran {len(queries)} queries, budget is {budget}:\n{statements}"
+        )
+    
+    return response
+
+def explain(sql):
+    """
+    Get the query plan of an SQL statement (with its parameters inlined)
+    Returns: plan text, one line per plan node
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Small test tables are always cheaper to scan; only report
+            # scans that no index could avoid
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+        
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+def sequential_scans(sql):
+    """
+    Find the tables an SQL statement reads with a sequential scan
+    Returns: tuple of (list of table names, plan text)
+    """
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    if pattern is None:
+        raise ValueError(f"Query plans are not supported on {connection.vendor}")
+    
+    plan = explain(sql)
+    return pattern.findall(plan), plan
+
+def assert_no_sequential_scans(func, *args, ignore_tables=(), **kwargs):
+    """
+    Run a function and fail if any SELECT it runs scans a table sequentially.
+    
+    The function runs in a transaction that is rolled back afterwards.
+    
+    Args:
+        func: Function to run (e.g. a service query)
+        *args, **kwargs: Passed on to the function
+        ignore_tables: Tables that may be scanned (e.g. small reference data)
+    
+    Returns:
+        Number of SELECT statements checked
+    """
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            result = func(*args, **kwargs)
+            # Evaluate lazy querysets
+            if hasattr(result, '_fetch_all'):
+                list(result)
+        
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        failures = []
+        for sql in selects:
+            tables, plan = sequential_scans(sql)
+            tables = [table for table in tables if table not in ignore_tables]
+            if tables:
+                failures.append(f"{sql}\n  scans {', '.join(tables)}:\n{plan}")
+        
+        transaction.set_rollback(True)
+    
+    if failures:
+        raise AssertionError(
+            f"{getattr(func, '__name__', func)} scans tables sequentially:\n" + '\n\n'.join(failures)
+        )
+    
+    return len(selects)
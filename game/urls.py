@@ -5,7 +5,7 @@ from game.views import (
     
     # Player views
     dashboard_view, profile_view, locations_view, 
-    travel_view, train_view, inventory_view,
+    travel_view, route_view, train_view, inventory_view,
     
     # Combat views
     combat_view, attack_player_view, combat_detail_view,
@@ -17,9 +17,13 @@ from game.views import (
     # Property views
     property_view, purchase_property_view, collect_income_view,
     upgrade_property_view, sell_property_view, property_detail_view,
+    income_forecast_view,
     
     # Crime views
-    crimes_view, commit_crime_view, crime_detail_view, crime_stats_view
+    crimes_view, commit_crime_view, crime_detail_view, crime_stats_view,
+    
+    # Staff views
+    staff_metrics_view
 )
 
 urlpatterns = [
@@ -33,6 +37,7 @@ urlpatterns = [
     path('profile/', profile_view, name='profile'),
     path('locations/', locations_view, name='locations'),
     path('travel/<int:location_id>/', travel_view, name='travel'),
+    path('route/<int:location_id>/', route_view, name='route'),
     path('train/', train_view, name='train'),
     path('inventory/', inventory_view, name='inventory'),
     
@@ -52,6 +57,7 @@ urlpatterns = [
     # Property
     path('property/', property_view, name='property'),
     path('property/buy/', purchase_property_view, name='purchase_property'),
+    path('property/forecast/', income_forecast_view, name='income_forecast'),
     path('property/collect/', collect_income_view, name='collect_all_income'),
     path('property/collect/<int:property_id>/', collect_income_view, name='collect_property_income'),
     path('property/upgrade/<int:property_id>/', upgrade_property_view, name='upgrade_property'),
@@ -63,4 +69,7 @@ urlpatterns = [
     path('crimes/commit/<int:crime_type_id>/', commit_crime_view, name='commit_crime'),
     path('crimes/detail/<int:result_id>/', crime_detail_view, name='crime_detail'),
     path('crimes/stats/', crime_stats_view, name='crime_stats'),
+    
+    # Staff
+    path('staff/metrics/', staff_metrics_view, name='staff_metrics'),
 ]
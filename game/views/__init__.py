@@ -10,6 +10,7 @@ from .player_views import (
     profile_view,
     locations_view,
     travel_view,
+    route_view,
     train_view,
     inventory_view
 )
@@ -35,7 +36,8 @@ from .property_views import (
     collect_income_view,
     upgrade_property_view,
     sell_property_view,
-    property_detail_view
+    property_detail_view,
+    income_forecast_view
 )
 
 from .crime_views import (
@@ -44,3 +46,7 @@ from .crime_views import (
     crime_detail_view,
     crime_stats_view
 )
+
+from .staff_views import (
+    staff_metrics_view
+)
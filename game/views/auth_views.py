@@ -1,4 +1,5 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
@@ -29,7 +30,7 @@ def login_view(request):
     else:
         form = AuthenticationForm()
         
-    return render(request, 'game/login.html', {'form': form})
+    return TemplateResponse(request, 'game/login.html', {'form': form})
 
 @require_http_methods(["GET", "POST"])
 def register_view(request):
@@ -49,7 +50,7 @@ def register_view(request):
     else:
         form = RegistrationForm()
         
-    return render(request, 'game/register.html', {'form': form})
+    return TemplateResponse(request, 'game/register.html', {'form': form})
 
 @login_required
 def logout_view(request):
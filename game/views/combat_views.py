@@ -1,16 +1,19 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponseBadRequest
 from django.db.models import Q
 
-from game.models import Player, Combat
+from game.models import Combat
 from game.services import get_available_opponents, initiate_combat, get_recent_combat_logs
+from game.metrics import query_budget
 
+@query_budget(6)
 @login_required
 def combat_view(request):
     """Display combat options and history"""
-    player = request.user.player
+    player = request.player
     
     # Get potential opponents at the current location
     opponents = get_available_opponents(player, player.current_location)
@@ -24,13 +27,13 @@ def combat_view(request):
         'combat_logs': combat_logs
     }
     
-    return render(request, 'game/combat.html', context)
+    return TemplateResponse(request, 'game/combat.html', context)
 
 @login_required
 def attack_player_view(request, player_id):
     """Attack another player"""
-    attacker = request.user.player
-    defender = get_object_or_404(Player, id=player_id)
+    attacker = request.player
+    defender = request.players.get_or_404(player_id)
     
     # Check if attacker is trying to attack themselves
     if attacker.id == defender.id:
@@ -75,7 +78,7 @@ def attack_player_view(request, player_id):
 @login_required
 def combat_detail_view(request, combat_id):
     """View details of a specific combat"""
-    player = request.user.player
+    player = request.player
     combat = get_object_or_404(
         Combat.objects.filter(
             Q(attacker=player) | Q(defender=player)
@@ -85,7 +88,7 @@ def combat_detail_view(request, combat_id):
     context = {
         'player': player,
         'combat': combat,
-        'logs': combat.logs.all().order_by('timestamp')
+        'logs': combat.logs.all()
     }
     
-    return render(request, 'game/combat_detail.html', context)
+    return TemplateResponse(request, 'game/combat_detail.html', context)
@@ -1,14 +1,16 @@
 """
 Views for crime-related functionality.
 """
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.http import require_http_methods
-from django.db.models import Sum
 
-from ..models.crime import CrimeType, CrimeResult
-from ..services import crime_service
+from ..models.crime import CrimeResult
+from ..services import crime_service, page_cache_service
+from ..metrics import query_budget
 
 @login_required
 def crimes_view(request):
@@ -23,20 +25,20 @@ def crimes_view(request):
     # Get recent crime results
     recent_results = crime_service.get_recent_crimes(player)
     
-    # Get crime stats
-    if recent_results.exists():
+    # Get crime stats (only read if the cached fragment showing them is stale)
+    def get_crime_stats():
         crime_stats = crime_service.get_crime_stats(player)
-    else:
-        crime_stats = None
+        return crime_stats if crime_stats['total_crimes'] else None
     
     context = {
         'player': player,
         'available_crimes': available_crimes,
         'recent_results': recent_results,
-        'crime_stats': crime_stats,
+        'crime_stats': SimpleLazyObject(get_crime_stats),
+        'page_cache': page_cache_service.fragment_versions(player),
     }
     
-    return render(request, 'game/crimes.html', context)
+    return TemplateResponse(request, 'game/crimes.html', context)
 
 @login_required
 @require_http_methods(["POST"])
@@ -106,12 +108,13 @@ def crime_detail_view(request, result_id):
             'crime_type': result.crime_type,
         }
         
-        return render(request, 'game/crime_detail.html', context)
+        return TemplateResponse(request, 'game/crime_detail.html', context)
         
     except Exception as e:
         messages.error(request, f"Error loading crime details: {str(e)}")
         return redirect('crimes')
 
+@query_budget(4)
 @login_required
 def crime_stats_view(request):
     """
@@ -119,44 +122,20 @@ def crime_stats_view(request):
     """
     player = request.player
     
-    # Get basic stats
-    crime_stats = crime_service.get_crime_stats(player)
+    # Totals per crime type, summed for the overall stats
+    type_stats = crime_service.get_crime_type_stats(player)
+    crime_stats = crime_service.get_crime_stats(player, type_stats)
     
-    # Get stats per crime type
-    crime_types = CrimeType.objects.filter(
-        results__player=player
-    ).distinct()
-    
-    crime_type_stats = []
-    for crime_type in crime_types:
-        total = CrimeResult.objects.filter(
-            player=player, 
-            crime_type=crime_type
-        ).count()
-        
-        successes = CrimeResult.objects.filter(
-            player=player, 
-            crime_type=crime_type,
-            result='success'
-        ).count()
-        
-        success_rate = (successes / total * 100) if total > 0 else 0
-        
-        earnings = CrimeResult.objects.filter(
-            player=player, 
-            crime_type=crime_type,
-            result='success'
-        ).values('cash_reward').aggregate(
-            total=Sum('cash_reward')
-        )['total'] or 0
-        
-        crime_type_stats.append({
-            'name': crime_type.name,
-            'total': total,
-            'successes': successes,
-            'success_rate': round(success_rate, 1),
-            'earnings': earnings,
-        })
+    crime_type_stats = [
+        {
+            'name': stats.crime_type.name,
+            'total': stats.attempts,
+            'successes': stats.successes,
+            'success_rate': stats.success_rate,
+            'earnings': stats.cash_earned,
+        }
+        for stats in type_stats
+    ]
     
     context = {
         'player': player,
@@ -164,4 +143,4 @@ def crime_stats_view(request):
         'crime_type_stats': crime_type_stats,
     }
     
-    return render(request, 'game/crime_stats.html', context) 
\ No newline at end of file
+    return TemplateResponse(request, 'game/crime_stats.html', context) 
\ No newline at end of file
@@ -1,7 +1,8 @@
 """
 Views for marketplace functionality.
 """
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -9,14 +10,18 @@ from django.views.decorators.http import require_http_methods
 
 from ..models.item import Item, ItemType
 from ..services import market_service
+from ..services.reference_data_service import get_reference_data
+from ..metrics import query_budget
 
+@query_budget(6)
 @login_required
 def market_view(request):
     """
     Main marketplace view showing active listings.
     """
     player = request.player
-    item_types = ItemType.objects.all()
+    reference_data = get_reference_data()
+    item_types = reference_data.all_item_types()
     
     # Get filter parameters
     item_type_id = request.GET.get('item_type')
@@ -26,7 +31,7 @@ def market_view(request):
     filters = {}
     if item_type_id:
         try:
-            filters['item_type'] = ItemType.objects.get(id=item_type_id)
+            filters['item_type'] = reference_data.get(ItemType, item_type_id)
         except ItemType.DoesNotExist:
             pass
     
@@ -55,7 +60,7 @@ def market_view(request):
         'max_price': filters.get('max_price'),
     }
     
-    return render(request, 'game/market.html', context)
+    return TemplateResponse(request, 'game/market.html', context)
 
 @login_required
 @require_http_methods(["POST"])
@@ -156,7 +161,7 @@ def player_listings_view(request):
         'include_sold': include_sold,
     }
     
-    return render(request, 'game/player_listings.html', context)
+    return TemplateResponse(request, 'game/player_listings.html', context)
 
 @login_required
 def api_get_inventory_items(request):
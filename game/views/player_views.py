@@ -1,21 +1,24 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
+from django.http import Http404, JsonResponse
 
-from game.models import Player, Location, LocationConnection
-from game.services import use_energy
+from game.models import Player, Location
+from game.services import use_energy, page_cache_service, routing_service
+from game.services.reference_data_service import get_reference_data
 from game.forms import PlayerProfileForm
+from game.metrics import query_budget
 
+@query_budget(5)
 @login_required
 def dashboard_view(request):
     """Display the player's dashboard"""
-    player = request.user.player
+    player = request.player
     
     # Get connected locations for travel options
-    connected_locations = LocationConnection.objects.filter(
-        from_location=player.current_location
-    ).select_related('to_location')
+    connected_locations = get_reference_data().connections_from(player.current_location_id)
     
     # Get other players at this location
     nearby_players = Player.objects.filter(
@@ -39,15 +42,16 @@ def dashboard_view(request):
         'connected_locations': connected_locations,
         'nearby_players': nearby_players,
         'nearby_properties': nearby_properties,
-        'recent_events': recent_events
+        'recent_events': recent_events,
+        'page_cache': page_cache_service.fragment_versions(player)
     }
     
-    return render(request, 'game/dashboard.html', context)
+    return TemplateResponse(request, 'game/dashboard.html', context)
 
 @login_required
 def profile_view(request):
     """Display the player's profile"""
-    player = request.user.player
+    player = request.player
     
     if request.method == 'POST':
         form = PlayerProfileForm(request.POST, instance=player)
@@ -63,35 +67,31 @@ def profile_view(request):
         'form': form
     }
     
-    return render(request, 'game/profile.html', context)
+    return TemplateResponse(request, 'game/profile.html', context)
 
 @login_required
 def locations_view(request):
     """Display all locations in the game"""
-    player = request.user.player
-    
-    # Get all locations grouped by district
-    locations = Location.objects.all().order_by('district', 'name')
-    
-    # Group locations by district
-    districts = {}
-    for location in locations:
-        if location.district not in districts:
-            districts[location.district] = []
-        districts[location.district].append(location)
+    player = request.player
     
+    # Locations grouped by district (grouped once per reference data load)
     context = {
         'player': player,
-        'districts': districts
+        'districts': get_reference_data().districts,
+        'page_cache': page_cache_service.fragment_versions(player)
     }
     
-    return render(request, 'game/locations.html', context)
+    return TemplateResponse(request, 'game/locations.html', context)
 
 @login_required
 def travel_view(request, location_id):
     """Travel to a new location"""
-    player = request.user.player
-    destination = get_object_or_404(Location, id=location_id)
+    player = request.player
+    reference_data = get_reference_data()
+    try:
+        destination = reference_data.get(Location, location_id)
+    except Location.DoesNotExist:
+        raise Http404("No Location matches the given query.")
     
     # Check if player meets level requirement
     if player.level < destination.min_level:
@@ -99,26 +99,61 @@ def travel_view(request, location_id):
         return redirect('locations')
     
     # Check if location is connected to current location
-    connection = LocationConnection.objects.filter(
-        from_location=player.current_location,
-        to_location=destination
-    ).first()
+    connection = reference_data.connection(player.current_location_id, destination.id)
     
+    route = None
     if not connection and player.current_location.id != destination.id:
-        # Check if we're allowing direct travel to any location (for prototype)
-        messages.warning(request, f"Traveling to {destination.name} without a direct route.")
+        # Follow the shortest route through other locations (by ?by=time or cost)
+        by = request.GET.get('by', 'time')
+        if by not in routing_service.METRICS:
+            by = 'time'
+        route = routing_service.plan_route(player.current_location, destination, by, player.level)
+        
+        if route is None:
+            # Check if we're allowing direct travel to any location (for prototype)
+            messages.warning(request, f"Traveling to {destination.name} without a direct route.")
     
     # Update player location
     player.current_location = destination
     player.save()
     
-    messages.success(request, f"You have traveled to {destination.name}.")
+    if route is not None:
+        stops = routing_service.describe_route(route)
+        via = ', '.join(stop['name'] for stop in stops[1:-1])
+        messages.success(
+            request,
+            f"You have traveled to {destination.name} via {via} "
+            f"({route.travel_time}s, ${route.travel_cost})."
+        )
+    else:
+        messages.success(request, f"You have traveled to {destination.name}.")
     return redirect('dashboard')
 
+@login_required
+def route_view(request, location_id):
+    """
+    API endpoint to plan the shortest route to a location.
+    """
+    player = request.player
+    by = request.GET.get('by', 'time')
+    if by not in routing_service.METRICS:
+        return JsonResponse({'error': f"Unknown route metric: {by}"}, status=400)
+    
+    route = routing_service.plan_route(player.current_location_id, location_id, by, player.level)
+    if route is None:
+        return JsonResponse({'error': "No route to this location"}, status=404)
+    
+    return JsonResponse({
+        'by': by,
+        'travel_time': route.travel_time,
+        'travel_cost': route.travel_cost,
+        'stops': routing_service.describe_route(route),
+    })
+
 @login_required
 def train_view(request):
     """Train player stats"""
-    player = request.user.player
+    player = request.player
     
     if request.method == 'POST':
         stat = request.POST.get('stat')
@@ -145,12 +180,12 @@ def train_view(request):
         ]
     }
     
-    return render(request, 'game/train.html', context)
+    return TemplateResponse(request, 'game/train.html', context)
 
 @login_required
 def inventory_view(request):
     """Display player's inventory"""
-    player = request.user.player
+    player = request.player
     
     # Get player's inventory items
     inventory_items = player.inventory.all().select_related('item')
@@ -160,4 +195,4 @@ def inventory_view(request):
         'inventory': inventory_items
     }
     
-    return render(request, 'game/inventory.html', context)
+    return TemplateResponse(request, 'game/inventory.html', context)
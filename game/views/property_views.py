@@ -1,14 +1,15 @@
 """
 Views for property management functionality.
 """
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 
 from ..models.property import Property, PropertyType
-from ..models.location import Location
-from ..services import property_service, energy_service
+from ..services import property_service, energy_service, economy_service, page_cache_service
+from ..services.reference_data_service import get_reference_data
 
 @login_required
 def property_view(request):
@@ -24,16 +25,17 @@ def property_view(request):
     available_properties = property_service.get_available_properties(player)
     
     # Get locations for property placement
-    locations = Location.objects.filter(min_level__lte=player.level)
+    locations = get_reference_data().all_locations(max_level=player.level)
     
     context = {
         'player': player,
         'properties': properties,
         'available_properties': available_properties,
         'locations': locations,
+        'page_cache': page_cache_service.fragment_versions(player),
     }
     
-    return render(request, 'game/property.html', context)
+    return TemplateResponse(request, 'game/property.html', context)
 
 @login_required
 @require_http_methods(["POST"])
@@ -77,7 +79,8 @@ def collect_income_view(request, property_id=None):
     
     try:
         # Check if player has enough energy
-        if not energy_service.use_energy(player, 5):
+        energy_success, _ = energy_service.use_energy(player, 5)
+        if not energy_success:
             messages.error(request, "You don't have enough energy to collect income.")
             return redirect('property')
         
@@ -155,13 +158,33 @@ def property_detail_view(request, property_id):
         context = {
             'player': player,
             'property': player_property,
-            'upgrade_cost': int(player_property.current_value * 0.5),
+            'upgrade_cost': int(player_property.current_value * Property.UPGRADE_COST_FACTOR),
             'sell_value': int(player_property.current_value * 0.7),
             'time_since_collection': time_since_collection,
         }
         
-        return render(request, 'game/property_detail.html', context)
+        return TemplateResponse(request, 'game/property_detail.html', context)
         
     except Exception as e:
         messages.error(request, f"Error loading property details: {str(e)}")
         return redirect('property')
+
+@login_required
+def income_forecast_view(request):
+    """
+    Forecast income and upgrade outcomes for all of the player's properties.
+    """
+    player = request.player
+    
+    forecast = economy_service.get_income_forecast(player)
+    names = dict(player.properties.filter(is_active=True).values_list('id', 'name'))
+    for row in forecast['properties']:
+        row['name'] = names.get(row['id'])
+    
+    context = {
+        'player': player,
+        'properties': forecast['properties'],
+        'totals': forecast['totals'],
+    }
+    
+    return TemplateResponse(request, 'game/income_forecast.html', context)
@@ -0,0 +1,20 @@
+"""
+Views for staff-only tooling.
+"""
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+
+from ..metrics import view_metrics
+
+@staff_member_required
+def staff_metrics_view(request):
+    """
+    Per-view query and latency metrics for this process, as JSON.
+    Pass ?reset=1 to clear the window after reading it.
+    """
+    summary = view_metrics.summary()
+    
+    if request.GET.get('reset'):
+        view_metrics.reset()
+    
+    return JsonResponse({'views': summary})